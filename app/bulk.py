@@ -0,0 +1,108 @@
+# bulk.py
+#
+# Request parsing and reporting shared by the bulk import endpoints
+# (POST /api/<entity>/bulk). The body is a JSON array of objects, or NDJSON
+# (one object per line) when sent as application/x-ndjson. Handlers validate
+# every row against key sets loaded once per request and write the valid rows
+# with one execute_values statement.
+#
+# ?mode=atomic (default): nothing is written if any row fails.
+# ?mode=best-effort: valid rows are written, failed rows are reported,
+# including rows the database itself rejects (e.g. a value too long).
+
+import json
+import os
+
+from flask import jsonify
+
+MAX_ROWS = int(os.environ.get("BULK_MAX_ROWS", 10000))
+MODES = ("atomic", "best-effort")
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+
+class BulkRequestError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def row_error(index, error, status):
+    return {"index": index, "error": error, "status": status}
+
+
+def _collect(items, rows, errors):
+    for index, row in items:
+        if len(rows) + len(errors) >= MAX_ROWS:
+            raise BulkRequestError(f"At most {MAX_ROWS} rows per request", 413)
+        if isinstance(row, dict):
+            rows.append((index, row))
+        else:
+            errors.append(row_error(index, "Row must be a JSON object", 400))
+
+
+def _ndjson_lines(stream, errors):
+    index = 0
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield index, json.loads(line)
+        except ValueError:
+            errors.append(row_error(index, "Invalid JSON", 400))
+        index += 1
+
+
+def read_rows(request):
+    """(rows as [(index, dict)], parse errors, atomic) from a bulk request."""
+    mode = request.args.get("mode", "atomic")
+    if mode not in MODES:
+        raise BulkRequestError(f"mode must be one of: {', '.join(MODES)}")
+    rows, errors = [], []
+    if request.mimetype in NDJSON_TYPES:
+        # Read line by line rather than buffering the whole body as one string
+        _collect(_ndjson_lines(request.stream, errors), rows, errors)
+    else:
+        body = request.get_json(silent=True)
+        if not isinstance(body, list):
+            raise BulkRequestError("Body must be a JSON array or NDJSON")
+        _collect(enumerate(body), rows, errors)
+    return rows, errors, mode == "atomic"
+
+
+def handle(request, create):
+    """Parse a bulk request and pass it to create(rows, errors, atomic)."""
+    try:
+        rows, errors, atomic = read_rows(request)
+    except BulkRequestError as e:
+        return jsonify(Error=str(e)), e.status
+    return create(rows, errors, atomic)
+
+
+def import_rows(rows, errors, atomic, prepare, insert):
+    """
+    prepare(row) returns (values, None) or (None, (error, status)); the valid
+    values are written with one insert(values, skip_failed) call, which
+    returns the created rows as dicts and (position in values, error, status)
+    for the rows the database refused. In atomic mode a failure writes
+    nothing and the response has the first failed row's status; otherwise
+    partial success is a 207.
+    """
+    valid, indexes = [], []
+    for index, row in rows:
+        values, error = prepare(row)
+        if error:
+            errors.append(row_error(index, *error))
+        else:
+            valid.append(values)
+            indexes.append(index)
+    errors.sort(key=lambda e: e["index"])
+    if errors and atomic:
+        return jsonify(Created=[], Errors=errors), errors[0]["status"]
+    created = []
+    if valid:
+        created, failed = insert(valid, not atomic)
+        if failed:
+            errors.extend(row_error(indexes[position], error, status) for position, error, status in failed)
+            errors.sort(key=lambda e: e["index"])
+    return jsonify(Created=created, Errors=errors), 207 if errors else 201
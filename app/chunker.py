@@ -0,0 +1,105 @@
+# chunker.py
+#
+# Single-pass, token-aware splitter for syllabus text. Each document is
+# tokenized once with the embedder's own tokenizer; chunks are cut at the
+# strongest nearby boundary (paragraph > line > sentence > word) and overlap
+# the previous chunk by a fixed number of tokens. split_stream() does the
+# same over text that arrives in pieces, keeping only a bounded window.
+
+from typing import Iterable, Iterator, List
+
+PARAGRAPH, LINE, SENTENCE, WORD, INSIDE_WORD = 3, 2, 1, 0, -1
+SENTENCE_END = (".", "!", "?", ":", ";")
+
+
+class TokenChunker:
+    def __init__(self, tokenizer, tokens_per_chunk: int = 128, chunk_overlap: int = 32):
+        if chunk_overlap >= tokens_per_chunk:
+            raise ValueError("chunk_overlap must be smaller than tokens_per_chunk")
+        self.tokenizer = tokenizer
+        self.tokens_per_chunk = tokens_per_chunk
+        self.chunk_overlap = chunk_overlap
+
+    def _offsets(self, text: str):
+        encoding = self.tokenizer(
+            text, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+        )
+        # Some tokenizers emit zero-width tokens; they cannot anchor a cut
+        return [span for span in encoding["offset_mapping"] if span[1] > span[0]]
+
+    @staticmethod
+    def _boundaries(text: str, offsets) -> List[int]:
+        """Boundary strength before each token, from the text between it and the previous one."""
+        scores = [PARAGRAPH]
+        for (_, prev_end), (start, _) in zip(offsets, offsets[1:]):
+            gap = text[prev_end:start]
+            if "\n\n" in gap:
+                scores.append(PARAGRAPH)
+            elif "\n" in gap:
+                scores.append(LINE)
+            elif gap and not gap.strip():
+                scores.append(SENTENCE if text[prev_end - 1] in SENTENCE_END else WORD)
+            else:
+                scores.append(INSIDE_WORD)
+        return scores
+
+    def split_text(self, text: str) -> List[str]:
+        chunks, _ = self._split(text, final=True)
+        return chunks
+
+    def split_stream(self, pieces: Iterable[str], window_chunks: int = 16) -> Iterator[str]:
+        """
+        Chunk text that arrives in pieces (e.g. cleaned pages). Text is
+        tokenized once enough has accumulated for about window_chunks chunks;
+        only the unfinished tail is carried over and tokenized again.
+        """
+        # ~4 characters per token is typical for English WordPiece
+        window_chars = window_chunks * self.tokens_per_chunk * 4
+        buffer = ""
+        for piece in pieces:
+            buffer += piece
+            if len(buffer) >= window_chars:
+                chunks, consumed = self._split(buffer, final=False)
+                yield from chunks
+                buffer = buffer[consumed:]
+        if buffer:
+            chunks, _ = self._split(buffer, final=True)
+            yield from chunks
+
+    def _split(self, text: str, final: bool):
+        """
+        Returns (chunks, consumed). Unless final, the last window is not cut
+        because more text may follow; consumed is the character offset where
+        that unfinished window starts.
+        """
+        offsets = self._offsets(text)
+        if not offsets:
+            return [], len(text)
+        scores = self._boundaries(text, offsets)
+        size, overlap, total = self.tokens_per_chunk, self.chunk_overlap, len(offsets)
+
+        chunks = []
+        start = 0
+        while True:
+            limit = min(start + size, total)
+            if limit == total and not final:
+                return chunks, offsets[start][0]
+            end = limit
+            if limit < total:
+                # Strongest boundary in the second half of the window, latest on ties
+                best = max(range(start + size // 2, limit + 1), key=lambda i: (scores[i], i))
+                if scores[best] > INSIDE_WORD:
+                    end = best
+
+            chunk = text[offsets[start][0]:offsets[end - 1][1]].strip()
+            if chunk:
+                chunks.append(chunk)
+            if end >= total:
+                return chunks, len(text)
+
+            # Start the overlap at a sentence or word boundary when possible
+            window = range(max(end - overlap, start + 1), end)
+            next_start = next((i for i in window if scores[i] >= SENTENCE), None)
+            if next_start is None:
+                next_start = next((i for i in window if scores[i] >= WORD), end)
+            start = next_start
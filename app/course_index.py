@@ -0,0 +1,136 @@
+# course_index.py
+#
+# In-memory index of the class table for resolving the course a chatbot
+# question is about: exact (cname, ccode) lookup plus trigram matching on the
+# description, without a database round-trip per question. ClassHandler keeps
+# it current on create / update / delete; other processes pick changes up when
+# their copy is older than COURSE_INDEX_TTL seconds.
+
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+TTL = float(os.environ.get("COURSE_INDEX_TTL", 300))
+# Share of a description's trigrams that must appear in the question text
+DESCRIPTION_THRESHOLD = 0.5
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def trigrams(text: str) -> set:
+    """pg_trgm-style trigrams: lower-cased words padded with two spaces in front, one behind."""
+    grams = set()
+    for word in _WORD.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _load_courses():
+    from app.dao.classes import ClassDAO
+    dao = ClassDAO()
+    try:
+        return dao.get_course_keys()
+    finally:
+        dao.close()
+
+
+class _Snapshot:
+    """Lookup structures for one version of the class table; never modified."""
+
+    def __init__(self, courses: Dict[int, Tuple[str, str, str]]):
+        self.by_code = {}
+        self.descriptions = []                  # (cid, lower-cased cdesc), by cid
+        self.desc_trigrams = {}                 # cid -> trigram count
+        self.by_trigram = {}                    # trigram -> [cid]
+        for cid in sorted(courses):
+            cname, ccode, cdesc = courses[cid]
+            self.by_code.setdefault(((cname or "").upper(), ccode), cid)
+            if not cdesc:
+                continue
+            self.descriptions.append((cid, cdesc.lower()))
+            grams = trigrams(cdesc)
+            self.desc_trigrams[cid] = len(grams)
+            for gram in grams:
+                self.by_trigram.setdefault(gram, []).append(cid)
+
+
+class CourseIndex:
+    def __init__(self, load=_load_courses, ttl: float = TTL):
+        self.load = load
+        self.ttl = ttl
+        self._courses = {}          # cid -> (cname, ccode, cdesc)
+        self._snapshot = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def find(self, cname: str, ccode: str) -> Optional[int]:
+        return self._current().by_code.get((cname.upper(), ccode))
+
+    def find_by_description(self, text: str) -> Optional[int]:
+        """
+        The course whose description contains text (what the old LIKE query
+        matched), else the one whose description trigrams best appear in text.
+        """
+        needle = text.strip().lower()
+        if not needle:
+            return None
+        snapshot = self._current()
+        for cid, description in snapshot.descriptions:
+            if needle in description:
+                return cid
+
+        query = trigrams(text)
+        if not query:
+            return None
+        shared = Counter(cid for gram in query for cid in snapshot.by_trigram.get(gram, ()))
+        best, best_key = None, None
+        for cid, count in shared.items():
+            total = snapshot.desc_trigrams[cid]
+            coverage = count / total
+            if coverage < DESCRIPTION_THRESHOLD:
+                continue
+            # Ties go to the closer overall match (trigram Jaccard)
+            key = (coverage, count / (total + len(query) - count), -cid)
+            if best_key is None or key > best_key:
+                best, best_key = cid, key
+        return best
+
+    def upsert(self, cid: int, cname: str, ccode: str, cdesc: str) -> None:
+        with self._lock:
+            if self._snapshot is None:
+                return      # not loaded yet; the first lookup reads the table
+            self._courses[cid] = (cname, ccode, cdesc)
+            self._snapshot = _Snapshot(self._courses)
+
+    def remove(self, cid: int) -> None:
+        with self._lock:
+            if self._courses.pop(cid, None) is not None:
+                self._snapshot = _Snapshot(self._courses)
+
+    def refresh(self) -> None:
+        courses = {row[0]: (row[1], row[2], row[3]) for row in self.load()}
+        with self._lock:
+            self._courses = courses
+            self._snapshot = _Snapshot(courses)
+            self._loaded_at = time.monotonic()
+
+    def _current(self) -> _Snapshot:
+        if self._snapshot is None or time.monotonic() - self._loaded_at > self.ttl:
+            with self._refresh_lock:
+                # Only one thread reloads; the others use what it loaded
+                if self._snapshot is None or time.monotonic() - self._loaded_at > self.ttl:
+                    self.refresh()
+        return self._snapshot
+
+    def _reset_after_fork(self) -> None:
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+
+course_index = CourseIndex()
@@ -1,24 +1,21 @@
-from app.config.dbconfig import pg_config
-import psycopg2
-from typing import List, Tuple, Optional
+from psycopg2 import sql
 
+from app.dao.pool import PooledDAO, db_pool
+from typing import Dict, List, Tuple, Optional
 
-class ClassDAO:
-    def __init__(self):
-        connection_url = (
-            f"dbname={pg_config['dbname']} "
-            f"user={pg_config['user']} "
-            f"password={pg_config['passwd']} "
-            f"port={pg_config['port']} "
-            f"host={pg_config.get('host', 'localhost')}"
-        )
-        self.conn = psycopg2.connect(connection_url)
 
+class ClassDAO(PooledDAO):
     def get_ccodes(self) -> List[str]:
         with self.conn.cursor() as cur:
             cur.execute("SELECT ccode FROM class;")
             return [row[0] for row in cur.fetchall()]
 
+    def get_course_keys(self) -> List[Tuple[int, str, str, str]]:
+        """(cid, cname, ccode, cdesc) of every class, for the chatbot's course index."""
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT cid, cname, ccode, cdesc FROM class;")
+            return cur.fetchall()
+
     def create_class(self, cname, ccode, cdesc, term, years, cred, csyllabus) -> int:
         with self.conn.cursor() as cur:
             cur.execute(
@@ -33,6 +30,20 @@ class ClassDAO:
         self.conn.commit()
         return cid
 
+    def create_classes(self, rows: List[Tuple], skip_failed: bool = False) -> Tuple[List[Tuple], List[Tuple]]:
+        """
+        Insert (cname, ccode, cdesc, term, years, cred, csyllabus) rows;
+        returns (created rows, failures) as PooledDAO._insert_returning.
+        """
+        return self._insert_returning(
+            """
+            INSERT INTO class (cname, ccode, cdesc, term, years, cred, csyllabus) VALUES %s
+            RETURNING cid, cname, ccode, cdesc, term, years, cred, csyllabus;
+            """,
+            rows,
+            skip_failed,
+        )
+
     def get_class(self, cid: int) -> Optional[Tuple]:
         with self.conn.cursor() as cur:
             cur.execute(
@@ -74,43 +85,32 @@ class ClassDAO:
             req_cnt = cur.fetchone()[0]
             return (sec_cnt + req_cnt) > 0
 
-    def close(self):
-        if self.conn and not self.conn.closed:
-            self.conn.close()
+
+# Tables whose serial key falls behind MAX(key) when rows are imported with
+# explicit ids
+SEQUENCE_TABLES = (("class", "cid"), ("room", "rid"), ("meeting", "mid"), ("section", "sid"))
 
 
-def sync_all_sequences():
+def sync_all_sequences() -> Dict[str, int]:
     """
-    Syncs both room_rid_seq and class_cid_seq.
-    Safe after data imports.
+    Move each serial sequence past its table's largest key so inserts after a
+    data import do not hit duplicate keys. Returns {table: next value}.
+    Run after imports: python -m app.maintenance sync-sequences
     """
-    try:
-        from app.dao.rooms import RoomDAO
-        room_dao = RoomDAO()
-        with room_dao.conn.cursor() as cur:
-            cur.execute("""
-                SELECT setval(
-                    pg_get_serial_sequence('room', 'rid'),
-                    COALESCE((SELECT MAX(rid) FROM room), 0) + 1,
-                    false
-                );
-            """)
-        room_dao.conn.commit()
-        room_dao.close()
-    except Exception as e:
-        print("Room sequence sync failed:", e)
-
-    try:
-        class_dao = ClassDAO()
-        with class_dao.conn.cursor() as cur:
-            cur.execute("""
-                SELECT setval(
-                    pg_get_serial_sequence('class', 'cid'),
-                    COALESCE((SELECT MAX(cid) FROM class), 0) + 1,
-                    false
-                );
-            """)
-        class_dao.conn.commit()
-        class_dao.close()
-    except Exception as e:
-        print("Class sequence sync failed:", e)
\ No newline at end of file
+    synced = {}
+    with db_pool.connection() as conn:
+        with conn.cursor() as cur:
+            for table, column in SEQUENCE_TABLES:
+                cur.execute(
+                    sql.SQL("""
+                        SELECT setval(
+                            pg_get_serial_sequence(%s, %s),
+                            COALESCE((SELECT MAX({column}) FROM {table}), 0) + 1,
+                            false
+                        );
+                    """).format(column=sql.Identifier(column), table=sql.Identifier(table)),
+                    (table, column),
+                )
+                synced[table] = cur.fetchone()[0]
+        conn.commit()
+    return synced
@@ -1,22 +1,6 @@
+from app.dao.pool import PooledDAO
 
-from app.config.dbconfig import pg_config
-import psycopg2
-
-class MeetingDAO:
-    def __init__(self):
-        connection_url = (
-            f"dbname={pg_config['dbname']} "
-            f"user={pg_config['user']} "
-            f"password={pg_config['passwd']} "
-            f"port={pg_config['port']} "
-            f"host={pg_config.get('host', 'localhost')}"
-        )
-        self.conn = psycopg2._connect(connection_url)
-
-    # --- Add this ---
-    def close(self):
-        if self.conn and not self.conn.closed:
-            self.conn.close()
+class MeetingDAO(PooledDAO):
     def get_all_meetings(self):
         cursor = self.conn.cursor()
         query = "SELECT * FROM meeting;"
@@ -36,9 +20,6 @@ class MeetingDAO:
 
     def create_meeting(self, ccode, starttime, endtime, cdays) -> int:
         """Insert meeting, return mid."""
-        # Make sure the sequence is in sync before inserting
-        self.sync_meeting_sequence()
-
         with self.conn.cursor() as cursor:
             cursor.execute(
                 """
@@ -53,6 +34,14 @@ class MeetingDAO:
         self.conn.commit()
         return mid
 
+    def create_meetings(self, rows, skip_failed=False) -> tuple:
+        """Insert (ccode, starttime, endtime, cdays) rows; returns (created rows, failures)."""
+        query = """
+            INSERT INTO meeting (ccode, starttime, endtime, cdays) VALUES %s
+            RETURNING mid, ccode, starttime, endtime, cdays;
+        """
+        return self._insert_returning(query, rows, skip_failed)
+
     def get_meeting(self, mid: int) -> dict | None:
         """Return meeting dict or None."""
         cursor = self.conn.cursor()
@@ -86,23 +75,3 @@ class MeetingDAO:
         count = cursor.fetchone()[0]
         return count != 0
 
-    @staticmethod
-    def sync_meeting_sequence():
-        """Sync the meeting_mid_seq after imports to prevent duplicate key errors."""
-        from app.dao.meeting import MeetingDAO
-        dao = MeetingDAO()
-        try:
-            with dao.conn.cursor() as cur:
-                cur.execute("""
-                     SELECT setval(
-                         pg_get_serial_sequence('meeting', 'mid'),
-                         COALESCE((SELECT MAX(mid) FROM meeting), 0) + 1,
-                         false
-                     );
-                 """)
-                print("meeting_mid_seq synced to:", cur.fetchone()[0])
-            dao.conn.commit()
-        except Exception as e:
-            print("Meeting sequence sync failed:", e)
-        finally:
-            dao.close()
\ No newline at end of file
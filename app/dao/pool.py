@@ -0,0 +1,214 @@
+# pool.py
+#
+# Process-wide connection pool shared by every DAO. Connections are opened on
+# demand up to DB_POOL_MAX, kept open when returned and handed out again, so a
+# request no longer pays a TCP + auth handshake. A DAO holds one connection
+# from construction until close(); `with db_pool.connection() as conn:` is the
+# equivalent for code that does not go through a DAO.
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.extras import execute_values
+from psycopg2.pool import PoolError
+
+from app.config.dbconfig import pg_config
+
+MAX_CONNECTIONS = int(os.environ.get("DB_POOL_MAX", 10))
+# Seconds to wait for a free connection before raising PoolError
+CHECKOUT_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 10))
+# Idle connections older than this are closed instead of reused, so
+# connections dropped by the server or a proxy are not handed out
+MAX_IDLE = float(os.environ.get("DB_POOL_MAX_IDLE", 300))
+
+
+def connect():
+    """Open a new connection from DATABASE_URL, or from pg_config when it is not set."""
+    if os.environ.get("DATABASE_URL"):
+        return psycopg2.connect(os.environ["DATABASE_URL"], sslmode="require")
+    return psycopg2.connect(
+        f"dbname={pg_config['dbname']} user={pg_config['user']} "
+        f"password={pg_config['passwd']} port={pg_config['port']} "
+        f"host={pg_config.get('host', 'localhost')}"
+    )
+
+
+class ConnectionPool:
+    def __init__(self, connect=connect, max_connections: int = MAX_CONNECTIONS,
+                 timeout: float = CHECKOUT_TIMEOUT, max_idle: float = MAX_IDLE):
+        self._connect = connect
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._init_state()
+        # Connections must not be shared with a forked child; it starts empty
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _init_state(self):
+        # Reentrant: PooledDAO.__del__ can run putconn from garbage collection
+        # while this thread is already inside a locked section
+        self._lock = threading.RLock()
+        self._slots = threading.BoundedSemaphore(self.max_connections)
+        self._idle = []             # (connection, returned_at), most recent last
+        self._checked_out = {}      # id(connection) -> connection
+        self.opened = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.discarded = 0
+
+    def getconn(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise PoolError(f"no database connection free after {self.timeout}s "
+                            f"({self.max_connections} in use)")
+        try:
+            conn = self._take_idle()
+            if conn is None:
+                conn = self._connect()
+                with self._lock:
+                    self.opened += 1
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._checked_out[id(conn)] = conn
+            self.checkouts += 1
+        return conn
+
+    def putconn(self, conn, discard: bool = False) -> None:
+        """Return a connection; an open transaction is rolled back first."""
+        with self._lock:
+            if self._checked_out.pop(id(conn), None) is None:
+                return      # already returned, or checked out before a fork
+        try:
+            if not discard and not conn.closed:
+                status = conn.info.transaction_status
+                if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                    discard = True
+                elif status != extensions.TRANSACTION_STATUS_IDLE:
+                    try:
+                        conn.rollback()
+                    except psycopg2.Error:
+                        discard = True
+            if discard or conn.closed:
+                self._close(conn)
+            else:
+                with self._lock:
+                    self._idle.append((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max": self.max_connections,
+                "in_use": len(self._checked_out),
+                "idle": len(self._idle),
+                "opened": self.opened,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "discarded": self.discarded,
+            }
+
+    def closeall(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            conn.close()
+
+    def _take_idle(self):
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                conn, returned_at = self._idle.pop()
+            if not conn.closed and now - returned_at <= self.max_idle:
+                return conn
+            self._close(conn)
+
+    def _close(self, conn) -> None:
+        with self._lock:
+            self.discarded += 1
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def _reset_after_fork(self) -> None:
+        # Closing an inherited connection would end the parent's session on
+        # the shared socket, so the child keeps them referenced and unused.
+        self._inherited = [conn for conn, _ in self._idle] + list(self._checked_out.values())
+        self._init_state()
+
+
+db_pool = ConnectionPool()
+
+
+class PooledDAO:
+    """Base class for DAOs: self.conn is a pooled connection until close()."""
+
+    def __init__(self):
+        self.conn = db_pool.getconn()
+
+    def close(self):
+        conn, self.conn = getattr(self, "conn", None), None
+        if conn is not None:
+            db_pool.putconn(conn)
+
+    def _insert_returning(self, query, rows, skip_failed=False, page_size=1000):
+        """
+        Run an INSERT ... VALUES %s RETURNING query for rows and commit.
+        Returns (created rows, failures). With skip_failed, a batch the
+        database rejects (a value too long for its column, a constraint) is
+        retried one row per savepoint in the same transaction, so locks taken
+        earlier stay held; failures lists (position in rows, error, status)
+        for the rows it refused. Otherwise the error propagates.
+        """
+        with self.conn.cursor() as cur:
+            if not skip_failed:
+                created = execute_values(cur, query, rows, page_size=page_size, fetch=True)
+                self.conn.commit()
+                return created, []
+            failures = []
+            cur.execute("SAVEPOINT bulk_insert;")
+            try:
+                created = execute_values(cur, query, rows, page_size=page_size, fetch=True)
+            except (psycopg2.DataError, psycopg2.IntegrityError):
+                cur.execute("ROLLBACK TO SAVEPOINT bulk_insert;")
+                created = []
+                for position, row in enumerate(rows):
+                    cur.execute("SAVEPOINT bulk_row;")
+                    try:
+                        created.extend(execute_values(cur, query, [row], fetch=True))
+                    except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+                        cur.execute("ROLLBACK TO SAVEPOINT bulk_row;")
+                        status = 409 if isinstance(e, psycopg2.IntegrityError) else 400
+                        failures.append((position, e.diag.message_primary or str(e), status))
+                    else:
+                        cur.execute("RELEASE SAVEPOINT bulk_row;")
+        self.conn.commit()
+        return created, failures
+
+    def __del__(self):
+        # Handlers that never call close() still give the connection back
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
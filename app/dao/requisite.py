@@ -1,21 +1,6 @@
-from app.config.dbconfig import pg_config
-import psycopg2
-
-class RequisiteDAO:
-    def __init__(self):
-        connection_url = (
-            f"dbname={pg_config['dbname']} "
-            f"user={pg_config['user']} "
-            f"password={pg_config['passwd']} "
-            f"port={pg_config['port']} "
-            f"host={pg_config.get('host', 'localhost')}"
-        )
-        self.conn = psycopg2._connect(connection_url)
-
-    def close(self):
-        if self.conn and not self.conn.closed:
-            self.conn.close()
+from app.dao.pool import PooledDAO
 
+class RequisiteDAO(PooledDAO):
     def create_requisite(self, classid, reqid, prereq) -> None:
         """Insert (classid, reqid). Validate FKs, no self, no dup, no A↔B cycle."""
         cursor = self.conn.cursor()
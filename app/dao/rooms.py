@@ -1,19 +1,8 @@
-from app.config.dbconfig import pg_config
-import psycopg2
-from typing import Set, Tuple, Optional
+from app.dao.pool import PooledDAO
+from typing import List, Set, Tuple, Optional
 
 
-class RoomDAO:
-    def __init__(self):
-        connection_url = (
-            f"dbname={pg_config['dbname']} "
-            f"user={pg_config['user']} "
-            f"password={pg_config['passwd']} "
-            f"port={pg_config['port']} "
-            f"host={pg_config.get('host', 'localhost')}"
-        )
-        self.conn = psycopg2.connect(connection_url)
-
+class RoomDAO(PooledDAO):
     def get_room_locations(self) -> Set[Tuple[str, str]]:
         with self.conn.cursor() as cur:
             cur.execute("SELECT building, room_number FROM room;")
@@ -33,6 +22,22 @@ class RoomDAO:
         self.conn.commit()
         return rid
 
+    def create_rooms(
+        self, rows: List[Tuple[str, str, int]], skip_failed: bool = False
+    ) -> Tuple[List[Tuple], List[Tuple]]:
+        """
+        Insert (building, room_number, capacity) rows; returns (created rows,
+        failures) as PooledDAO._insert_returning.
+        """
+        return self._insert_returning(
+            """
+            INSERT INTO room (building, room_number, capacity) VALUES %s
+            RETURNING rid, building, room_number, capacity;
+            """,
+            rows,
+            skip_failed,
+        )
+
     def get_room(self, rid: int) -> Optional[Tuple]:
         with self.conn.cursor() as cur:
             cur.execute(
@@ -71,25 +76,3 @@ class RoomDAO:
             cur.execute("SELECT COUNT(*) FROM section WHERE roomid = %s;", (rid,))
             return cur.fetchone()[0] > 0
 
-    def close(self):
-        if self.conn and not self.conn.closed:
-            self.conn.close()
-
-
-# GLOBAL SYNC FUNCTION — CALL ONCE
-def sync_all_sequences():
-    dao = RoomDAO()
-    try:
-        with dao.conn.cursor() as cur:
-            cur.execute("""
-                SELECT setval(
-                    pg_get_serial_sequence('room', 'rid'),
-                    COALESCE((SELECT MAX(rid) FROM room), 0) + 1,
-                    false
-                );
-            """)
-        dao.conn.commit()
-    except Exception as e:
-        print("Sequence sync failed:", e)
-    finally:
-        dao.close()
\ No newline at end of file
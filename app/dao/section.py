@@ -1,20 +1,55 @@
-from app.config.dbconfig import pg_config
-import psycopg2
-
-class SectionDAO:
-    def __init__(self):
-        connection_url = (
-            f"dbname={pg_config['dbname']} "
-            f"user={pg_config['user']} "
-            f"password={pg_config['passwd']} "
-            f"port={pg_config['port']} "
-            f"host={pg_config.get('host', 'localhost')}"
-        )
-        self.conn = psycopg2._connect(connection_url)
-
-    def close(self):
-        if self.conn and not self.conn.closed:
-            self.conn.close()
+from app.dao.pool import PooledDAO
+
+# Order in which failed checks are reported, matching the old handler
+SECTION_CHECKS = ("foreign_key", "capacity", "format", "schedule")
+
+# Every check and the write run in one statement; the write only happens
+# when all checks pass, and the checks row is returned either way.
+SAVE_SECTION_QUERY = """
+    WITH checks AS (
+        SELECT EXISTS (SELECT 1 FROM class WHERE cid = %(cid)s)
+                 AND EXISTS (SELECT 1 FROM room WHERE rid = %(roomid)s)
+                 AND EXISTS (SELECT 1 FROM meeting WHERE mid = %(mid)s) AS foreign_key,
+               COALESCE((SELECT capacity FROM room WHERE rid = %(roomid)s) >= %(capacity)s, FALSE) AS capacity,
+               %(valid_format)s AS format,
+               NOT EXISTS (
+                   SELECT 1 FROM section
+                   NATURAL INNER JOIN meeting
+                   WHERE sid != %(sid)s
+                     AND roomid = %(roomid)s
+                     AND cdays = (SELECT cdays FROM meeting WHERE mid = %(mid)s)
+                     AND section.semester = %(semester)s
+                     AND section.years = %(years)s
+               ) AS schedule
+    ),
+    written AS (
+        {write}
+        RETURNING section.sid, section.cid, section.mid, section.roomid,
+                  section.semester, section.years, section.capacity
+    )
+    SELECT checks.foreign_key, checks.capacity, checks.format, checks.schedule,
+           written.sid, written.cid, written.mid, written.roomid,
+           written.semester, written.years, written.capacity
+    FROM checks LEFT JOIN written ON TRUE;
+"""
+
+INSERT_SECTION = """
+        INSERT INTO section (roomid, cid, mid, semester, years, capacity)
+        SELECT %(roomid)s, %(cid)s, %(mid)s, %(semester)s, %(years)s, %(capacity)s
+        FROM checks
+        WHERE foreign_key AND capacity AND format AND schedule
+"""
+
+UPDATE_SECTION = """
+        UPDATE section
+        SET cid = %(cid)s, mid = %(mid)s, roomid = %(roomid)s, semester = %(semester)s,
+            years = %(years)s, capacity = %(capacity)s
+        FROM checks
+        WHERE section.sid = %(sid)s
+          AND checks.foreign_key AND checks.capacity AND checks.format AND checks.schedule
+"""
+
+class SectionDAO(PooledDAO):
     def get_all_sections(self):
         """Return all sections."""
         cursor = self.conn.cursor()
@@ -26,15 +61,6 @@ class SectionDAO:
         return result
 
 
-    def create_section(self, roomid, cid, mid, semester, years, capacity) -> int:
-        """Insert section, return sid. Validate FKs, capacity, time conflicts."""
-        cursor = self.conn.cursor()
-        query = "INSERT INTO section (roomid, cid, mid, semester, years, capacity) VALUES (%s, %s, %s, %s, %s, %s) returning *;"
-        cursor.execute(query, (roomid, cid, mid, semester, years, capacity,))
-        sid = cursor.fetchone()[0]
-        self.conn.commit()
-        return sid
-
     def get_section(self, sid: int) -> dict | None:
         """Return section dict or None."""
         cursor = self.conn.cursor()
@@ -43,15 +69,6 @@ class SectionDAO:
         result = cursor.fetchone()
         return result
 
-    def update_section(self, sid, roomid, cid, mid, semester, years, capacity) -> bool | None:
-        """Update section. Re-check conflicts."""
-        cursor = self.conn.cursor()
-        query = "update section set cid = %s, mid = %s, roomid = %s, semester = %s, years = %s, capacity = %s where sid = %s;"
-        cursor.execute(query, (cid, mid, roomid, semester, years, capacity, sid,))
-        rowcount = cursor.rowcount
-        self.conn.commit()
-        return rowcount == 1
-
     def delete_section(self, sid: int) -> None:
         """Delete section."""
         cursor = self.conn.cursor()
@@ -61,57 +78,89 @@ class SectionDAO:
         self.conn.commit()
         return rowcount == 1
 
-    def check_mid_existence(self, mid):
+    def save_section(self, sid, roomid, cid, mid, semester, years, capacity, valid_format=True):
+        """
+        Validate and insert (sid None) or update a section in one statement.
+        Returns (row, None) on success, else (None, name of the first failed
+        check in SECTION_CHECKS order), or (None, None) when sid does not exist.
+        """
+        # Non-integer keys never matched the old list lookups; keep them out of the query
+        if not all(isinstance(key, int) and not isinstance(key, bool) for key in (cid, roomid, mid)):
+            return None, "foreign_key"
+        cursor = self.conn.cursor()
+        # Serialize writers for the same room and term. Taken in its own
+        # statement so the checks below see sections committed while waiting.
+        cursor.execute("SELECT pg_advisory_xact_lock(%s, hashtext(%s));", (roomid, f"{semester}/{years}",))
+        params = {
+            "sid": sid if sid is not None else 0,
+            "roomid": roomid, "cid": cid, "mid": mid,
+            "semester": semester, "years": years, "capacity": capacity,
+            "valid_format": valid_format,
+        }
+        cursor.execute(SAVE_SECTION_QUERY.format(write=INSERT_SECTION if sid is None else UPDATE_SECTION), params)
+        row = cursor.fetchone()
+        self.conn.commit()
+        checks, section = row[:len(SECTION_CHECKS)], row[len(SECTION_CHECKS):]
+        for name, ok in zip(SECTION_CHECKS, checks):
+            if not ok:
+                return None, name
+        if section[0] is None:
+            return None, None
+        return section, None
+
+    def get_class_ids(self) -> set:
         cursor = self.conn.cursor()
-        query = "select mid from meeting;"
-        cursor.execute(query, (mid,))
-        rows = cursor.fetchall()
-        return [row[0] for row in rows]
-    def check_roomid_existence(self, roomid):
+        cursor.execute("SELECT cid FROM class;")
+        return {row[0] for row in cursor}
+
+    def get_room_capacities(self) -> dict:
         cursor = self.conn.cursor()
-        query = "select rid from room;"
-        cursor.execute(query, (roomid,))
-        rows = cursor.fetchall()
-        return [row[0] for row in rows]
-    def check_cid_existence(self, cid):
+        cursor.execute("SELECT rid, capacity FROM room;")
+        return dict(cursor.fetchall())
+
+    def get_meeting_days(self) -> dict:
         cursor = self.conn.cursor()
-        query = "select cid from class;"
-        cursor.execute(query, (cid,))
-        rows = cursor.fetchall()
-        return [row[0] for row in rows]
+        cursor.execute("SELECT mid, cdays FROM meeting;")
+        return dict(cursor.fetchall())
 
-    def check_capacity(self, roomid, capacity):
+    def lock_schedules(self, keys) -> None:
+        """
+        Take save_section's advisory lock for every (roomid, "semester/years")
+        key, in a fixed order so two bulk writers cannot deadlock. Held until
+        the transaction ends; nothing is committed here.
+        """
+        keys = sorted(keys)
+        if not keys:
+            return
         cursor = self.conn.cursor()
-        query = "SELECT capacity FROM room WHERE rid = %s;"
-        cursor.execute(query, (roomid,))
-        row = cursor.fetchone()
-        if row is None:
-            return False
-        elif int(capacity) > int(row[0]):
-            return False
-        else:
-            return True
-
-    def check_scheduling_conflict(self, sid, roomid, mid, semester, years):
+        query = """
+            SELECT pg_advisory_xact_lock(k.roomid, hashtext(k.term))
+            FROM (
+                SELECT roomid, term, ord
+                FROM unnest(%s::int[], %s::text[]) WITH ORDINALITY AS k(roomid, term, ord)
+                ORDER BY ord
+            ) k;
+        """
+        cursor.execute(query, ([roomid for roomid, _ in keys], [term for _, term in keys],))
+
+    def get_scheduled_slots(self, roomids) -> set:
+        """(roomid, cdays, semester, years) already taken in the given rooms."""
         cursor = self.conn.cursor()
         query = """
-            SELECT * FROM section
-            NATURAL INNER JOIN meeting
-            WHERE sid != %s
-              AND roomid = %s
-              AND cdays = (SELECT cdays FROM meeting WHERE mid = %s)
-              AND section.semester = %s
-              AND section.years = %s;
+            SELECT DISTINCT roomid, cdays, section.semester, section.years
+            FROM section NATURAL INNER JOIN meeting
+            WHERE roomid = ANY(%s);
         """
+        cursor.execute(query, (list(roomids),))
+        return set(cursor.fetchall())
 
-        cursor.execute(query, (sid, roomid,mid,semester, years,))
-        result = []
-        for row in cursor:
-            result.append(row)
-        if len(result) > 0:
-            return False
-        else:
-            return True
+    def create_sections(self, rows, skip_failed=False) -> tuple:
+        """Insert (roomid, cid, mid, semester, years, capacity) rows; returns (created rows, failures)."""
+        query = """
+            INSERT INTO section (roomid, cid, mid, semester, years, capacity) VALUES %s
+            RETURNING sid, cid, mid, roomid, semester, years, capacity;
+        """
+        return self._insert_returning(query, rows, skip_failed)
 
     def get_stat_section_by_day(self, year, semester):
         cursor = self.conn.cursor()
@@ -1,21 +1,10 @@
 # app/dao/stats.py
 
-from app.config.dbconfig import pg_config
-import psycopg2
+from app.dao.pool import PooledDAO
 from typing import List, Dict, Optional
 
 
-class StatsDAO:
-    def __init__(self):
-        connection_url = "dbname=%s user=%s password=%s host=%s port=%s" % (
-            pg_config['dbname'],
-            pg_config['user'],
-            pg_config['passwd'],
-            pg_config['host'],
-            pg_config['port']
-        )
-        self.conn = psycopg2.connect(connection_url)
-
+class StatsDAO(PooledDAO):
     # ------------------------------------------------------------------
     # 1. Top classes by average meeting duration
     # ------------------------------------------------------------------
@@ -284,7 +273,3 @@ class StatsDAO:
             for row in rows
         ]
         return result
-
-    def close(self):
-        if self.conn and not self.conn.closed:
-            self.conn.close()
\ No newline at end of file
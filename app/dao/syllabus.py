@@ -1,82 +1,650 @@
-from app.config.dbconfig import pg_config
-import psycopg2
-from typing import List, Tuple
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+import hashlib
 import os
+import time
 
+import numpy as np
 
-class SyllabusDAO:
-    def __init__(self):
-        if os.environ.get("DATABASE_URL"):
-            self.conn = psycopg2.connect(os.environ["DATABASE_URL"], sslmode="require")
-        else:
-            connection_url = (
-                f"dbname={pg_config['dbname']} user={pg_config['user']} "
-                f"password={pg_config['passwd']} port={pg_config['port']} "
-                f"host={pg_config.get('host', 'localhost')}"
+from app.dao.pool import PooledDAO
+from app.dao.vector import Vector
+from app.dedup import simhash
+
+VECTOR_INDEX_NAME = "syllabus_embedding_idx"
+VECTOR_INDEX_METHODS = ("hnsw", "ivfflat")
+
+# Per-query search tunables; None keeps the server default
+# (hnsw.ef_search = 40, ivfflat.probes = 1).
+DEFAULT_EF_SEARCH = int(os.environ["SYLLABUS_EF_SEARCH"]) if os.environ.get("SYLLABUS_EF_SEARCH") else None
+DEFAULT_PROBES = int(os.environ["SYLLABUS_PROBES"]) if os.environ.get("SYLLABUS_PROBES") else None
+
+# Full-text side of hybrid retrieval. The chunk's tsvector is stored in a
+# generated column, so ranking reads it instead of re-parsing every match.
+TEXT_INDEX_NAME = "syllabus_chunk_tsv_idx"
+TEXT_VECTOR_COLUMN = "chunk_tsv"
+TEXT_SEARCH_CONFIG = "english"
+
+# Until syllabus_link and the chunk_tsv column exist, searches look them up
+# again at most this often instead of on every query.
+SCHEMA_CHECK_SECONDS = float(os.environ.get("SYLLABUS_SCHEMA_CHECK_SECONDS", 60))
+
+# Reciprocal-rank fusion: score = sum(weight / (RRF_K + rank)) over the
+# vector and full-text rankings; 60 is the constant from the RRF paper.
+RRF_K = int(os.environ.get("SYLLABUS_RRF_K", 60))
+DEFAULT_VECTOR_WEIGHT = float(os.environ.get("SYLLABUS_VECTOR_WEIGHT", 1.0))
+DEFAULT_TEXT_WEIGHT = float(os.environ.get("SYLLABUS_TEXT_WEIGHT", 1.0))
+
+# Called with the courseid after new chunks are written for that course,
+# e.g. to drop cached chatbot answers that may now be stale. Only fires in
+# the writing process; other processes compare get_syllabus_versions().
+chunk_write_listeners: List[Callable[[int], None]] = []
+
+
+def chunk_hash(chunk: str) -> str:
+    """sha256 of the chunk text; matches encode(sha256(convert_to(chunk, 'UTF8')), 'hex')."""
+    return hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+
+
+class SyllabusDAO(PooledDAO):
+    _extension_ready = False
+    _links_ready = False
+    _text_column_ready = False
+    _schema_checked_at = None
+
+    def __init__(self, create_extension: bool = True):
+        super().__init__()
+
+        # Once per process; pooled connections all reach the same database.
+        # Read-only callers such as a dry run pass create_extension=False.
+        if create_extension and not SyllabusDAO._extension_ready:
+            with self.conn.cursor() as cur:
+                cur.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+            self.conn.commit()
+            SyllabusDAO._extension_ready = True
+
+    def _insert_rows(self, courseid, chunks, embeddings, page_size=500) -> int:
+        rows = [
+            (courseid, chunk, Vector(emb), chunk_hash(chunk), simhash(chunk))
+            for chunk, emb in zip(chunks, embeddings)
+        ]
+        if rows:
+            with self.conn.cursor() as cur:
+                execute_values(
+                    cur,
+                    "INSERT INTO syllabus (courseid, chunk, embedding_text, chunk_hash, simhash) VALUES %s",
+                    rows,
+                    page_size=page_size,
+                )
+        return len(rows)
+
+    # ------------------------------------------------------------------
+    # Incremental ingestion manifest
+    # ------------------------------------------------------------------
+    def ensure_manifest_schema(self) -> None:
+        """
+        Create the manifest and link tables and the chunk_hash / simhash
+        columns, and hash rows ingested before the manifest existed so their
+        embeddings are reused.
+
+        Chunk text that several courses share verbatim is stored once, with
+        courseid NULL, and syllabus_link maps each course's chunk hash to it.
+        """
+        with self.conn.cursor() as cur:
+            missing = self._missing_columns(cur, ("chunk_hash", "simhash"))
+            if "chunk_hash" in missing:
+                cur.execute("ALTER TABLE syllabus ADD COLUMN chunk_hash CHAR(64);")
+            if "simhash" in missing:
+                cur.execute("ALTER TABLE syllabus ADD COLUMN simhash BIGINT;")
+            cur.execute(
+                """
+                UPDATE syllabus
+                SET chunk_hash = encode(sha256(convert_to(chunk, 'UTF8')), 'hex')
+                WHERE chunk_hash IS NULL;
+                """
+            )
+            cur.execute("CREATE INDEX IF NOT EXISTS syllabus_course_hash_idx ON syllabus (courseid, chunk_hash);")
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS syllabus_manifest (
+                    filename     VARCHAR PRIMARY KEY,
+                    courseid     INTEGER REFERENCES public.class,
+                    content_hash CHAR(64) NOT NULL,
+                    chunk_count  INTEGER,
+                    ingested_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+                """
             )
-            self.conn = psycopg2.connect(connection_url)
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS syllabus_link (
+                    courseid   INTEGER NOT NULL REFERENCES public.class,
+                    chunk_hash CHAR(64) NOT NULL,
+                    chunkid    INTEGER NOT NULL REFERENCES syllabus (chunkid) ON DELETE CASCADE,
+                    PRIMARY KEY (courseid, chunk_hash)
+                );
+                """
+            )
+            cur.execute("CREATE INDEX IF NOT EXISTS syllabus_link_chunkid_idx ON syllabus_link (chunkid);")
+        self.conn.commit()
+        SyllabusDAO._links_ready = True
+        self.create_text_index()
 
+        # Fingerprints are computed in Python, so older rows are filled in here
         with self.conn.cursor() as cur:
-            cur.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+            cur.execute("SELECT chunkid, chunk FROM syllabus WHERE simhash IS NULL;")
+            rows = [(chunkid, simhash(chunk)) for chunkid, chunk in cur.fetchall()]
+            if rows:
+                execute_values(
+                    cur,
+                    "UPDATE syllabus AS s SET simhash = v.simhash FROM (VALUES %s) AS v (chunkid, simhash) "
+                    "WHERE s.chunkid = v.chunkid",
+                    rows,
+                    page_size=1000,
+                )
         self.conn.commit()
 
-    def insert_chunk(self, courseid: int, chunk: str, embedding: List[float]) -> None:
-        embedding_str = "[" + ",".join(map(str, embedding)) + "]"
+    def manifest_ready(self) -> bool:
+        """True once ensure_manifest_schema has run against this database."""
+        with self.conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT to_regclass('syllabus_manifest') IS NOT NULL
+                   AND to_regclass('syllabus_link') IS NOT NULL
+                   AND EXISTS (SELECT 1 FROM information_schema.columns
+                               WHERE table_name = 'syllabus' AND column_name = 'chunk_hash');
+                """
+            )
+            return cur.fetchone()[0]
+
+    @staticmethod
+    def _missing_columns(cur, columns: Sequence[str]) -> Set[str]:
+        """
+        Which of columns syllabus lacks. ALTER TABLE takes an ACCESS EXCLUSIVE
+        lock even when IF NOT EXISTS makes it a no-op, which would queue behind
+        running searches and block new ones, so it is only issued when needed.
+        """
+        cur.execute(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_name = 'syllabus' AND column_name = ANY(%s);",
+            (list(columns),),
+        )
+        return set(columns) - {row[0] for row in cur.fetchall()}
+
+    def get_manifest(self) -> Dict[str, Tuple[int, str]]:
+        """filename -> (courseid, content_hash) for every ingested file."""
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT filename, courseid, content_hash FROM syllabus_manifest;")
+            return {row[0]: (row[1], row[2]) for row in cur.fetchall()}
+
+    def get_syllabus_versions(self) -> Dict[int, object]:
+        """courseid -> time its syllabus was last ingested; empty before the manifest exists."""
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT to_regclass('syllabus_manifest') IS NOT NULL;")
+            if not cur.fetchone()[0]:
+                return {}
+            cur.execute("SELECT courseid, MAX(ingested_at) FROM syllabus_manifest GROUP BY courseid;")
+            return dict(cur.fetchall())
+
+    def get_chunk_hashes(self, courseid: int) -> Set[str]:
+        """Hashes of the course's chunks, own rows and shared ones it links to."""
         with self.conn.cursor() as cur:
             cur.execute(
                 """
-                INSERT INTO syllabus (courseid, chunk, embedding_text)
-                VALUES (%s, %s, %s::vector)
+                SELECT chunk_hash FROM syllabus WHERE courseid = %s
+                UNION
+                SELECT chunk_hash FROM syllabus_link WHERE courseid = %s;
                 """,
-                (courseid, chunk, embedding_str),
+                (courseid, courseid),
             )
-        self.conn.commit()
+            return {row[0] for row in cur.fetchall()}
 
-    def get_relevant_chunks(
-        self, query_embedding: List[float], courseid: int = None, limit: int = 15
-    ) -> List[Tuple[str, int]]:
-        embedding_str = "[" + ",".join(map(str, query_embedding)) + "]"
+    def get_embeddings(self, chunk_hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """chunk_hash -> stored embedding, for the hashes that are stored."""
         with self.conn.cursor() as cur:
-            if courseid:
+            cur.execute(
+                """
+                SELECT DISTINCT ON (chunk_hash) chunk_hash, embedding_text::text
+                FROM syllabus WHERE chunk_hash = ANY(%s);
+                """,
+                (list(chunk_hashes),),
+            )
+            return {
+                row[0]: np.array(row[1].strip("[]").split(","), dtype=np.float32)
+                for row in cur.fetchall()
+            }
+
+    def get_fingerprints(self) -> List[Tuple[str, int, Optional[int]]]:
+        """(chunk_hash, simhash, courseid) of every stored chunk; courseid is None for shared rows."""
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT chunk_hash, simhash, courseid FROM syllabus WHERE simhash IS NOT NULL;")
+            return cur.fetchall()
+
+    def sync_file_chunks(
+        self, filename: str, courseid: int, content_hash: str, chunk_hashes: Sequence[str],
+        new_chunks: Sequence[str], new_embeddings: Sequence[Sequence[float]],
+        links: Optional[Sequence[str]] = None
+    ) -> Tuple[int, int]:
+        """
+        Bring the course's rows in line with the current version of its file,
+        in one transaction: rows and links whose hash is no longer in
+        chunk_hashes are deleted, new_chunks are inserted, and the manifest
+        entry is updated. Rows for unchanged chunks are left alone, embeddings
+        included.
+
+        links are hashes of chunks whose text another course already stores;
+        the stored row becomes shared (courseid NULL) and is linked to every
+        course that uses it. Shared rows no course links to any more are
+        deleted.
+        Assumes one syllabus file per course. Returns (inserted, deleted).
+        """
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute(
+                    "DELETE FROM syllabus WHERE courseid = %s AND NOT (chunk_hash = ANY(%s));",
+                    (courseid, list(chunk_hashes)),
+                )
+                deleted = cur.rowcount
+                cur.execute(
+                    "DELETE FROM syllabus_link WHERE courseid = %s AND NOT (chunk_hash = ANY(%s));",
+                    (courseid, list(chunk_hashes)),
+                )
+                unlinked = cur.rowcount
+            inserted = self._insert_rows(courseid, new_chunks, new_embeddings)
+            with self.conn.cursor() as cur:
+                for hash_ in links or ():
+                    self._link_chunk(cur, courseid, hash_)
+                deleted += self._delete_orphans(cur)
                 cur.execute(
                     """
-                    SELECT chunk, courseid
-                    FROM syllabus
-                    WHERE courseid = %s
-                    ORDER BY embedding_text <-> %s::vector
-                    LIMIT %s
+                    INSERT INTO syllabus_manifest (filename, courseid, content_hash, chunk_count)
+                    VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (filename) DO UPDATE
+                    SET courseid = EXCLUDED.courseid,
+                        content_hash = EXCLUDED.content_hash,
+                        chunk_count = EXCLUDED.chunk_count,
+                        ingested_at = CURRENT_TIMESTAMP;
                     """,
-                    (courseid, embedding_str, limit),
+                    (filename, courseid, content_hash, len(chunk_hashes)),
                 )
-            else:
-                cur.execute(
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        if inserted or deleted or unlinked or links:
+            for listener in chunk_write_listeners:
+                listener(courseid)
+        return inserted, deleted
+
+    @staticmethod
+    def _link_chunk(cur, courseid: int, hash_: str) -> None:
+        # Prefer a row that is already shared
+        cur.execute(
+            """
+            SELECT chunkid, courseid FROM syllabus
+            WHERE chunk_hash = %s
+            ORDER BY courseid IS NOT NULL, chunkid
+            LIMIT 1
+            FOR UPDATE;
+            """,
+            (hash_,),
+        )
+        row = cur.fetchone()
+        if row is None:
+            # Rolls back the file; it is picked up again on the next run
+            raise LookupError(f"shared chunk {hash_[:12]} no longer exists")
+        chunkid, owner = row
+        if owner is not None:
+            # Turn the owner's row into a shared one, linked back to the owner
+            cur.execute(
+                "INSERT INTO syllabus_link (courseid, chunk_hash, chunkid) VALUES (%s, %s, %s) "
+                "ON CONFLICT (courseid, chunk_hash) DO UPDATE SET chunkid = EXCLUDED.chunkid;",
+                (owner, hash_, chunkid),
+            )
+            cur.execute("UPDATE syllabus SET courseid = NULL WHERE chunkid = %s;", (chunkid,))
+        cur.execute(
+            "INSERT INTO syllabus_link (courseid, chunk_hash, chunkid) VALUES (%s, %s, %s) "
+            "ON CONFLICT (courseid, chunk_hash) DO UPDATE SET chunkid = EXCLUDED.chunkid;",
+            (courseid, hash_, chunkid),
+        )
+
+    @staticmethod
+    def _delete_orphans(cur) -> int:
+        """Delete shared rows that no course links to."""
+        cur.execute(
+            """
+            DELETE FROM syllabus AS s
+            WHERE s.courseid IS NULL
+              AND NOT EXISTS (SELECT 1 FROM syllabus_link AS l WHERE l.chunkid = s.chunkid);
+            """
+        )
+        return cur.rowcount
+
+    def remove_file(self, filename: str) -> int:
+        """Delete the chunks and manifest entry of a file that no longer exists."""
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute("DELETE FROM syllabus_manifest WHERE filename = %s RETURNING courseid;", (filename,))
+                row = cur.fetchone()
+                if row is None:
+                    self.conn.commit()
+                    return 0
+                courseid = row[0]
+                cur.execute("DELETE FROM syllabus WHERE courseid = %s;", (courseid,))
+                deleted = cur.rowcount
+                if self._has_links(cur):
+                    cur.execute("DELETE FROM syllabus_link WHERE courseid = %s;", (courseid,))
+                    deleted += self._delete_orphans(cur)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        if deleted:
+            for listener in chunk_write_listeners:
+                listener(courseid)
+        return deleted
+
+    def get_relevant_chunks(
+        self, query_embedding: Sequence[float], courseid: int = None, limit: int = 15,
+        ef_search: Optional[int] = DEFAULT_EF_SEARCH, probes: Optional[int] = DEFAULT_PROBES
+    ) -> List[Tuple[int, str, Optional[int], float]]:
+        """
+        (chunkid, chunk, courseid, distance) of the chunks with the highest
+        inner product with the query embedding, nearest first. Stored and
+        query embeddings are unit length, so this ranks by cosine similarity
+        and distance is the cosine distance (0 = same direction).
+        ef_search (HNSW) and probes (IVFFlat) trade recall for speed and only
+        apply to this query; a search within one course is exact.
+        """
+        embedding = Vector(query_embedding)
+        with self.conn.cursor() as cur:
+            tuned = self._apply_search_settings(cur, ef_search, probes)
+            condition, params = self._course_filter(cur, courseid)
+            cur.execute(
+                sql.SQL(
                     """
-                    SELECT chunk, courseid
+                    SELECT chunkid, chunk, courseid, 1 + (embedding_text <#> %(embedding)s) AS distance
                     FROM syllabus
-                    ORDER BY embedding_text <-> %s::vector
-                    LIMIT %s
+                    WHERE {condition}
+                    ORDER BY {order}
+                    LIMIT %(limit)s
+                    """
+                ).format(condition=condition, order=self._vector_order(courseid)),
+                {"embedding": embedding, "limit": limit, **params},
+            )
+            rows = cur.fetchall()
+        if tuned:
+            # End the transaction so the local settings do not leak into later queries
+            self.conn.commit()
+        return rows
+
+    def get_hybrid_chunks(
+        self, query_embedding: Sequence[float], query_text: str, courseid: int = None, limit: int = 15,
+        candidates: int = None, vector_weight: float = DEFAULT_VECTOR_WEIGHT,
+        text_weight: float = DEFAULT_TEXT_WEIGHT,
+        ef_search: Optional[int] = DEFAULT_EF_SEARCH, probes: Optional[int] = DEFAULT_PROBES
+    ) -> List[Tuple[int, str, Optional[int], float]]:
+        """
+        Same rows as get_relevant_chunks, ranked by reciprocal-rank fusion of
+        the vector ranking and a full-text ranking of query_text, in one
+        query. Each side contributes its top `candidates` rows (default
+        2 * limit). Query words are OR-ed, so a chunk matching only some of
+        them still ranks; ts_rank_cd favours chunks that match more. Rows
+        are in fused order, so distance is not monotonic. Until
+        create_text_index has run, this is get_relevant_chunks.
+        """
+        with self.conn.cursor() as cur:
+            self._check_schema(cur)
+        if not SyllabusDAO._text_column_ready:
+            # Without create_text_index the text side would parse every row
+            return self.get_relevant_chunks(
+                query_embedding, courseid=courseid, limit=limit, ef_search=ef_search, probes=probes
+            )
+        embedding = Vector(query_embedding)
+        with self.conn.cursor() as cur:
+            tuned = self._apply_search_settings(cur, ef_search, probes)
+            condition, params = self._course_filter(cur, courseid)
+            cur.execute(
+                sql.SQL(
+                    """
+                    WITH query AS (
+                        -- Stemmed query words OR-ed together; NULL if only stop words
+                        SELECT string_agg(quote_literal(lexeme), ' | ')::tsquery AS q
+                        FROM unnest(to_tsvector({config}, %(text)s))
+                    ),
+                    vector_hits AS (
+                        SELECT chunkid, row_number() OVER (ORDER BY score) AS rank
+                        FROM (
+                            SELECT chunkid, embedding_text <#> %(embedding)s AS score
+                            FROM syllabus
+                            WHERE {condition}
+                            ORDER BY {order}
+                            LIMIT %(candidates)s
+                        ) AS nearest
+                    ),
+                    text_hits AS (
+                        SELECT chunkid, row_number() OVER (ORDER BY ts_rank_cd({tsv}, query.q) DESC) AS rank
+                        FROM syllabus, query
+                        WHERE ({condition}) AND {tsv} @@ query.q
+                        ORDER BY rank
+                        LIMIT %(candidates)s
+                    )
+                    SELECT s.chunkid, s.chunk, s.courseid, 1 + (s.embedding_text <#> %(embedding)s) AS distance
+                    FROM vector_hits AS v
+                    FULL JOIN text_hits AS t USING (chunkid)
+                    JOIN syllabus AS s USING (chunkid)
+                    ORDER BY COALESCE(%(vector_weight)s / (%(rrf_k)s + v.rank), 0)
+                           + COALESCE(%(text_weight)s / (%(rrf_k)s + t.rank), 0) DESC,
+                             v.rank NULLS LAST
+                    LIMIT %(limit)s
+                    """
+                ).format(
+                    condition=condition, order=self._vector_order(courseid),
+                    config=sql.Literal(TEXT_SEARCH_CONFIG), tsv=sql.Identifier(TEXT_VECTOR_COLUMN),
+                ),
+                {
+                    "embedding": embedding, "text": query_text, "limit": limit,
+                    "candidates": candidates or 2 * limit, "rrf_k": RRF_K,
+                    "vector_weight": float(vector_weight), "text_weight": float(text_weight), **params,
+                },
+            )
+            rows = cur.fetchall()
+        if tuned:
+            self.conn.commit()
+        return rows
+
+    def _course_filter(self, cur, courseid: Optional[int]):
+        """Condition and parameters restricting a search to one course's chunks."""
+        if not courseid:
+            return sql.SQL("TRUE"), {}
+        if self._has_links(cur):
+            # The course's own rows plus the shared boilerplate it links to
+            return sql.SQL(
+                "courseid = %(courseid)s "
+                "OR chunkid IN (SELECT chunkid FROM syllabus_link WHERE courseid = %(courseid)s)"
+            ), {"courseid": courseid}
+        return sql.SQL("courseid = %(courseid)s"), {"courseid": courseid}
+
+    @staticmethod
+    def _vector_order(courseid: Optional[int]):
+        """
+        ORDER BY expression for the vector ranking. pgvector applies a WHERE
+        filter after the HNSW / IVFFlat scan, so a course's chunks among the
+        first ef_search candidates can be far fewer than LIMIT. A course has
+        few chunks, so filtered searches rank exactly instead: the `+ 0` keeps
+        the planner from using the vector index, and the courseid index finds
+        the rows.
+        """
+        if not courseid:
+            return sql.SQL("embedding_text <#> %(embedding)s")
+        return sql.SQL("(embedding_text <#> %(embedding)s) + 0")
+
+    def _has_links(self, cur) -> bool:
+        """Whether syllabus_link exists."""
+        self._check_schema(cur)
+        return SyllabusDAO._links_ready
+
+    @staticmethod
+    def _check_schema(cur) -> None:
+        """
+        Look up whether syllabus_link and the chunk_tsv column exist. Once both
+        do the answer is kept for the process; until then it is looked up
+        again at most every SCHEMA_CHECK_SECONDS, not on every search.
+        """
+        if SyllabusDAO._links_ready and SyllabusDAO._text_column_ready:
+            return
+        now = time.monotonic()
+        checked_at = SyllabusDAO._schema_checked_at
+        if checked_at is not None and now - checked_at < SCHEMA_CHECK_SECONDS:
+            return
+        cur.execute(
+            """
+            SELECT to_regclass('syllabus_link') IS NOT NULL,
+                   EXISTS (SELECT 1 FROM information_schema.columns
+                           WHERE table_name = 'syllabus' AND column_name = %s);
+            """,
+            (TEXT_VECTOR_COLUMN,),
+        )
+        SyllabusDAO._links_ready, SyllabusDAO._text_column_ready = cur.fetchone()
+        SyllabusDAO._schema_checked_at = now
+
+    @staticmethod
+    def _apply_search_settings(cur, ef_search: Optional[int], probes: Optional[int]) -> bool:
+        if ef_search is not None:
+            cur.execute("SELECT set_config('hnsw.ef_search', %s, true)", (str(int(ef_search)),))
+        if probes is not None:
+            cur.execute("SELECT set_config('ivfflat.probes', %s, true)", (str(int(probes)),))
+        return ef_search is not None or probes is not None
+
+    def normalize_stored_embeddings(self, batch_size: int = 5000) -> int:
+        """
+        One-off migration: rescale every stored embedding to unit length so
+        inner-product search ranks by cosine similarity. Runs in chunkid
+        ranges with a commit per batch; rows already normalized are skipped.
+        Requires pgvector >= 0.7 for l2_normalize.
+        """
+        updated = 0
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT COALESCE(MIN(chunkid), 0), COALESCE(MAX(chunkid), -1) FROM syllabus;")
+            low, high = cur.fetchone()
+            for start in range(low, high + 1, batch_size):
+                cur.execute(
+                    """
+                    UPDATE syllabus
+                    SET embedding_text = l2_normalize(embedding_text)
+                    WHERE chunkid >= %s AND chunkid < %s
+                      AND abs(vector_norm(embedding_text) - 1) > 1e-4;
                     """,
-                    (embedding_str, limit),
+                    (start, start + batch_size),
                 )
-            return cur.fetchall()
+                updated += cur.rowcount
+                self.conn.commit()
+        return updated
+
+    # ------------------------------------------------------------------
+    # Vector index management
+    # ------------------------------------------------------------------
+    def create_vector_index(
+        self, method: str = "hnsw", m: int = 16, ef_construction: int = 64,
+        lists: int = None, opclass: str = "vector_ip_ops"
+    ) -> None:
+        """
+        Create the pgvector index on syllabus.embedding_text if it does not exist.
+        HNSW uses m / ef_construction; IVFFlat uses lists, which defaults to
+        rows / 1000 (at least 10) as pgvector recommends. IVFFlat should be
+        built after the table has data, since its lists are trained on it.
+        """
+        if method not in VECTOR_INDEX_METHODS:
+            raise ValueError(f"Unknown vector index method: {method}")
+
+        with self.conn.cursor() as cur:
+            if method == "hnsw":
+                options = sql.SQL("m = {}, ef_construction = {}").format(
+                    sql.Literal(int(m)), sql.Literal(int(ef_construction))
+                )
+            else:
+                if lists is None:
+                    cur.execute("SELECT COUNT(*) FROM syllabus;")
+                    lists = max(10, cur.fetchone()[0] // 1000)
+                options = sql.SQL("lists = {}").format(sql.Literal(int(lists)))
 
-    def find_course(self, cname: str = None, ccode: str = None, cdesc: str = None) -> int:
+            cur.execute(
+                sql.SQL(
+                    "CREATE INDEX IF NOT EXISTS {} ON syllabus USING {} (embedding_text {}) WITH ({});"
+                ).format(
+                    sql.Identifier(VECTOR_INDEX_NAME),
+                    sql.SQL(method),
+                    sql.Identifier(opclass),
+                    options,
+                )
+            )
+            cur.execute("CREATE INDEX IF NOT EXISTS syllabus_courseid_idx ON syllabus (courseid);")
+        self.conn.commit()
+
+    def create_text_index(self) -> None:
+        """
+        Stored tsvector column and GIN index for the full-text side of hybrid
+        retrieval. Adding the column rewrites the table once, so on a large
+        table run it with `maintenance text-index create` outside busy hours.
+        """
         with self.conn.cursor() as cur:
-            if cname and ccode:
+            if self._missing_columns(cur, (TEXT_VECTOR_COLUMN,)):
                 cur.execute(
-                    "SELECT cid FROM class WHERE cname = %s AND ccode = %s LIMIT 1",
-                    (cname.upper(), ccode),
+                    sql.SQL(
+                        """
+                        ALTER TABLE syllabus ADD COLUMN {} tsvector
+                        GENERATED ALWAYS AS (to_tsvector({}, coalesce(chunk, ''))) STORED;
+                        """
+                    ).format(sql.Identifier(TEXT_VECTOR_COLUMN), sql.Literal(TEXT_SEARCH_CONFIG))
                 )
-            elif cdesc:
+            cur.execute("SELECT to_regclass(%s) IS NOT NULL;", (TEXT_INDEX_NAME,))
+            if not cur.fetchone()[0]:
                 cur.execute(
-                    "SELECT cid FROM class WHERE LOWER(cdesc) LIKE LOWER(%s) LIMIT 1",
-                    (f"%{cdesc}%",),
+                    sql.SQL("CREATE INDEX {} ON syllabus USING gin ({});").format(
+                        sql.Identifier(TEXT_INDEX_NAME), sql.Identifier(TEXT_VECTOR_COLUMN)
+                    )
                 )
-            else:
-                return None
-            result = cur.fetchone()
-            return result[0] if result else None
+        self.conn.commit()
+        SyllabusDAO._text_column_ready = True
 
-    def close(self):
-        if self.conn and not self.conn.closed:
-            self.conn.close()
+    def drop_text_index(self) -> None:
+        with self.conn.cursor() as cur:
+            cur.execute(sql.SQL("DROP INDEX IF EXISTS {};").format(sql.Identifier(TEXT_INDEX_NAME)))
+        self.conn.commit()
+
+    def drop_vector_index(self) -> None:
+        with self.conn.cursor() as cur:
+            cur.execute(sql.SQL("DROP INDEX IF EXISTS {};").format(sql.Identifier(VECTOR_INDEX_NAME)))
+        self.conn.commit()
+
+    def rebuild_vector_index(self) -> None:
+        """Rebuild the index in place, e.g. after a large ingestion run."""
+        with self.conn.cursor() as cur:
+            cur.execute(sql.SQL("REINDEX INDEX {};").format(sql.Identifier(VECTOR_INDEX_NAME)))
+        self.conn.commit()
+
+    def vector_index_info(self) -> Optional[dict]:
+        """Definition and size of the vector index, or None if it does not exist."""
+        with self.conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT i.indexdef,
+                       pg_relation_size(c.oid),
+                       pg_size_pretty(pg_relation_size(c.oid)),
+                       (SELECT COUNT(*) FROM syllabus)
+                FROM pg_indexes i
+                JOIN pg_class c ON c.relname = i.indexname
+                WHERE i.tablename = 'syllabus' AND i.indexname = %s;
+                """,
+                (VECTOR_INDEX_NAME,),
+            )
+            row = cur.fetchone()
+        if row is None:
+            return None
+        return {
+            "name": VECTOR_INDEX_NAME,
+            "definition": row[0],
+            "size_bytes": row[1],
+            "size": row[2],
+            "rows": row[3],
+        }
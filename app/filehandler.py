@@ -1,111 +1,599 @@
 # filehandler.py
-
+#
+# Syllabus ingestion, usable as a library (ingest()) or from the command line:
+#   python -m app.filehandler [--folder DIR] [--only CIIC-4020] [--workers N]
+#                             [--batch-size N] [--dry-run] [--force]
+#                             [--max-chars N] [--timeout S] [--max-worker-memory-mb MB]
+#                             [--no-embedding-cache] [--no-dedup]
+#
+# Staged ingestion pipeline:
+#   1. parse   – PdfReader extraction, cleaning and splitting in a process pool
+#   2. embed   – chunks from several files encoded together in large batches
+#   3. write   – a writer thread inserts each file's chunks into the DB
+# A bounded window of in-flight files and a bounded write queue keep memory flat.
+#
+# Ingestion is incremental: syllabus_manifest records each file's content hash,
+# unchanged files are skipped, chunks whose hash already exists for the course
+# keep their rows and embeddings, and files removed from the folder are dropped.
+# Chunk text several courses share verbatim (university policies, ADA
+# statements) is stored once and linked to each of them through syllabus_link.
+# A near-duplicate (SimHash, see app/dedup.py) keeps its own row and text but
+# reuses the other chunk's embedding instead of being encoded.
+
+import argparse
+import hashlib
+import json
+import multiprocessing
 import os
+import queue
+import signal
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
 from pypdf import PdfReader
-from langchain_text_splitters import RecursiveCharacterTextSplitter, SentenceTransformersTokenTextSplitter
-from sentence_transformers import SentenceTransformer
-from dao.classes import ClassDAO
-from dao.syllabus import SyllabusDAO
+from app.chunker import TokenChunker
+from app.dao.classes import ClassDAO
+from app.dao.syllabus import SyllabusDAO, chunk_hash
+from app.dedup import SimHashIndex, simhash
+from app.llm.embedcache import DEFAULT_CACHE_DIR, EmbeddingDiskCache
+from app.textclean import clean_pages
 import re
-
-
-def clean_syllabus_text(text: str) -> str:
-
-    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
-
-    text = re.sub(r'(\d)(\d{2,})%', r'\2%', text)
-    text = re.sub(r' +', ' ', text)
-
-    text = re.sub(r'\n{3,}', '\n\n', text)
-
-    text = re.sub(r' *\n *', '\n', text)
-
-    return text.strip()
-
-print("Starting FINAL ingestion...\n")
-
-model = SentenceTransformer("all-mpnet-base-v2")
-syllabus_dao = SyllabusDAO()
-class_dao = ClassDAO()
-
-# ------------------ TEXT SPLITTERS ------------------
-char_splitter = RecursiveCharacterTextSplitter(
-    separators=["\n\n", "\n", ". ", " ", ""],
-    chunk_size=600,
-    chunk_overlap=150,
-    length_function=len,
-    is_separator_regex=False,
-
-)
-
-token_splitter = SentenceTransformersTokenTextSplitter(
-    tokens_per_chunk=384,
-    chunk_overlap=100
-)
-
-folder = "SyllabusFolder"
-total_inserted = 0
-
-# Load class table mapping
-with class_dao.conn.cursor() as cur:
-    cur.execute("SELECT cid, cname, ccode FROM class")
-    course_map = {(row[1].upper(), row[2]): row[0] for row in cur.fetchall()}
-
-print(f"Loaded {len(course_map)} courses\n")
-
-# ------------------ PROCESS ALL PDFs ------------------
-for filename in os.listdir(folder):
-    if not filename.lower().endswith(".pdf"):
-        continue
-
-    parts = filename.split("-", 2)
-    if len(parts) < 2:
-        print(f"Skipping {filename} (invalid name format)\n")
-        continue
-
-    cname = parts[0].strip().upper()
-    ccode = parts[1].strip()
-    courseid = course_map.get((cname, ccode))
-
-    if not courseid:
-        print(f"NOT FOUND → {cname} {ccode} → skipping\n")
-        continue
-
-    print(f"Processing {filename} → {cname} {ccode} (cid={courseid})")
-
+import time
+
+DEFAULT_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "SyllabusFolder")
+EMBEDDING_MODEL = "all-mpnet-base-v2"
+TOKENIZER_NAME = "sentence-transformers/" + EMBEDDING_MODEL   # same tokenizer the embedder uses
+TOKENS_PER_CHUNK = 128
+CHUNK_OVERLAP = 32
+EMBED_BATCH_CHUNKS = 256     # chunks gathered across files before each encode call
+ENCODE_BATCH_SIZE = 64       # batch size passed to SentenceTransformer.encode
+WRITE_QUEUE_SIZE = 4         # encoded files waiting for the writer
+
+# Limits that keep one huge or malformed PDF from taking down the run
+MAX_PDF_CHARS = 5_000_000    # extracted characters per file
+FILE_TIMEOUT = 120           # seconds to parse and split one file
+MAX_WORKER_MEMORY_MB = 2048  # heap ceiling of each parse process (0 = no limit)
+
+
+class PdfLimitExceeded(Exception):
+    pass
+
+
+# ------------------ TEXT SPLITTER ------------------
+_chunker = None
+
+
+def get_chunker():
+    """Build the token chunker once per worker process."""
+    global _chunker
+    if _chunker is None:
+        # The pool already runs one process per core
+        os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(TOKENIZER_NAME)
+        _chunker = TokenChunker(tokenizer, tokens_per_chunk=TOKENS_PER_CHUNK, chunk_overlap=CHUNK_OVERLAP)
+    return _chunker
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ------------------ STAGE 1: PARSE (worker processes) ------------------
+def init_parse_worker(max_memory_mb):
+    """
+    Cap the worker's data segment so a runaway PDF raises MemoryError in
+    that worker instead of getting the whole job OOM-killed.
+    """
+    if not max_memory_mb:
+        return
     try:
-        reader = PdfReader(os.path.join(folder, filename))
-        text = "\n".join(page.extract_text() or "" for page in reader.pages)
-
-        if not text.strip():
-            print(" → PDF text empty, skipping\n")
+        import resource
+    except ImportError:   # not available on Windows
+        return
+    limit = max_memory_mb * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_DATA)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_DATA, (limit, hard))
+
+
+def _raise_timeout(signum, frame):
+    raise PdfLimitExceeded("timed out")
+
+
+def iter_pdf_pages(path: str, max_chars: int = MAX_PDF_CHARS):
+    """Yield the text of each page without holding the whole document."""
+    reader = PdfReader(path)
+    total = 0
+    for page in reader.pages:
+        text = page.extract_text() or ""
+        total += len(text)
+        if max_chars and total > max_chars:
+            raise PdfLimitExceeded(f"more than {max_chars:,} characters of text")
+        yield text
+
+
+def extract_chunks(path: str, max_chars: int = MAX_PDF_CHARS, timeout: int = FILE_TIMEOUT):
+    """Read, clean and split one PDF. Returns (chunks, seconds)."""
+    start = time.perf_counter()
+    chunker = get_chunker()
+
+    # Each pool worker runs tasks on its main thread, so SIGALRM can interrupt a stuck parse
+    use_alarm = bool(timeout) and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.alarm(timeout)
+    try:
+        # Pages flow through the cleaner and the chunker as they are extracted
+        pages = iter_pdf_pages(path, max_chars)
+        final_chunks = list(chunker.split_stream(clean_pages(pages)))
+    finally:
+        if use_alarm:
+            signal.alarm(0)
+    return final_chunks, time.perf_counter() - start
+
+
+# ------------------ STAGE 3: WRITE (writer thread) ------------------
+def write_worker(write_queue, stats, failures):
+    """
+    Write queued files until None arrives. An error that stops the writer
+    itself (e.g. no database connection) is appended to failures, so the
+    main thread can fail the run instead of waiting on a full queue.
+    """
+    syllabus_dao = None
+    try:
+        syllabus_dao = SyllabusDAO()
+        while True:
+            item = write_queue.get()
+            if item is None:
+                break
+            job, new_chunks, embeddings = item
+            try:
+                insert_start = time.perf_counter()
+                inserted, deleted = syllabus_dao.sync_file_chunks(
+                    job["filename"], job["courseid"], job["content_hash"],
+                    job["chunk_hashes"], new_chunks, embeddings, job["links"]
+                )
+                stats["write"] += time.perf_counter() - insert_start
+                stats["inserted"] += inserted
+                stats["deleted"] += deleted
+                print(f" → {job['filename']}: inserted {inserted}, deleted {deleted}, "
+                      f"linked {len(job['links'])}, "
+                      f"kept {len(job['chunk_hashes']) - inserted - len(job['links'])} chunks")
+            except Exception as e:
+                stats["errors"] += 1
+                print(f"Error writing {job['filename']}: {e}")
+    except Exception as e:
+        failures.append(e)
+    finally:
+        if syllabus_dao is not None:
+            syllabus_dao.close()
+
+
+def load_course_map():
+    class_dao = ClassDAO()
+    with class_dao.conn.cursor() as cur:
+        cur.execute("SELECT cid, cname, ccode FROM class")
+        course_map = {(row[1].upper(), row[2]): row[0] for row in cur.fetchall()}
+    class_dao.close()
+    return course_map
+
+
+def parse_course(course: str):
+    """'CIIC-4020', 'CIIC 4020' or 'ciic4020' -> ('CIIC', '4020')."""
+    match = re.fullmatch(r"\s*([A-Za-z]{2,4})[-\s]?(\d{3,4})\s*", course)
+    if not match:
+        raise ValueError(f"Invalid course: {course!r} (expected e.g. CIIC-4020)")
+    return match.group(1).upper(), match.group(2)
+
+
+def find_jobs(folder, course_map, only=None):
+    """(filename, courseid) for every PDF that maps to a known course."""
+    jobs = []
+    for filename in sorted(os.listdir(folder)):
+        if not filename.lower().endswith(".pdf"):
             continue
 
-        # Split into chunks
-        text = clean_syllabus_text(text)
-
-        char_chunks = char_splitter.split_text(text)
-
-        final_chunks = []
-        for chunk in char_chunks:
-            sub_chunks = token_splitter.split_text(chunk)
-            final_chunks.extend(sub_chunks)
-
-        final_chunks = [c for c in final_chunks if c.strip()]
-
-        embeddings = model.encode(final_chunks)
-
-        # Insert chunks into DB
-        for chunk, emb in zip(final_chunks, embeddings):
-            syllabus_dao.insert_chunk(courseid, chunk, emb.tolist())
+        parts = filename.split("-", 2)
+        if len(parts) < 2:
+            print(f"Skipping {filename} (invalid name format)\n")
+            continue
 
-        print(f" → Inserted {len(final_chunks)} chunks\n")
-        total_inserted += len(final_chunks)
+        cname = parts[0].strip().upper()
+        ccode = parts[1].strip()
+        if only is not None and (cname, ccode) not in only:
+            continue
+        courseid = course_map.get((cname, ccode))
 
-    except Exception as e:
-        print(f"Error: {e}\n")
+        if not courseid:
+            print(f"NOT FOUND → {cname} {ccode} → skipping\n")
+            continue
+        jobs.append((filename, courseid))
+    return jobs
+
+
+def ingest(folder=DEFAULT_FOLDER, batch_size=EMBED_BATCH_CHUNKS, workers=None,
+           dry_run=False, only=None, force=False, max_chars=MAX_PDF_CHARS,
+           timeout=FILE_TIMEOUT, max_worker_memory_mb=MAX_WORKER_MEMORY_MB,
+           embedding_cache=True, dedup=True) -> dict:
+    """
+    Ingest the syllabus PDFs in folder and return throughput metrics.
+
+    only      – course codes ('CIIC-4020') to restrict the run to; files of
+                other courses are neither processed nor removed
+    dry_run   – parse and chunk, report what would change, but do not load
+                the model or write to the database
+    force     – re-process files even when their content hash is unchanged
+    max_chars, timeout, max_worker_memory_mb
+              – per-file limits; a file that exceeds one is reported as an
+                error and skipped
+    embedding_cache
+              – reuse vectors from the on-disk embedding cache (shared
+                boilerplate is encoded once across courses and runs)
+    dedup     – store chunk text several courses share once, as a row
+                linked to each of them, and give near-duplicates (SimHash)
+                the embedding of the chunk they resemble
+    """
+    print("Starting FINAL ingestion...\n")
+    wall_start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    only = {parse_course(course) for course in only} if only else None
+
+    course_map = load_course_map()
+    print(f"Loaded {len(course_map)} courses\n")
+
+    # A dry run issues no DDL, not even CREATE EXTENSION
+    syllabus_dao = SyllabusDAO(create_extension=not dry_run)
+    if not dry_run:
+        syllabus_dao.ensure_manifest_schema()
+    manifest_ready = syllabus_dao.manifest_ready()
+    manifest = syllabus_dao.get_manifest() if manifest_ready else {}
+
+    stats = {"parse": 0.0, "embed": 0.0, "write": 0.0, "inserted": 0, "deleted": 0,
+             "errors": 0, "skipped": 0, "reused": 0, "linked": 0, "borrowed": 0, "chunks": 0}
+
+    # Files that disappeared from the folder
+    if only is None:
+        present = set(os.listdir(folder))
+        for filename in manifest:
+            if filename not in present:
+                deleted = 0 if dry_run else syllabus_dao.remove_file(filename)
+                stats["deleted"] += deleted
+                print(f"REMOVED → {filename} → deleted {deleted} chunks")
+
+    jobs = []
+    for filename, courseid in find_jobs(folder, course_map, only):
+        content_hash = file_hash(os.path.join(folder, filename))
+        if not force and manifest.get(filename) == (courseid, content_hash):
+            stats["skipped"] += 1
+            continue
+        jobs.append((filename, courseid, content_hash))
+    print(f"{len(jobs)} new or changed files, {stats['skipped']} unchanged\n")
+
+    # Stored chunks: owners by hash, and fingerprints with (chunk_hash, courseid) items
+    near_dups = SimHashIndex() if dedup else None
+    owners = {}           # chunk_hash -> courseids (None = shared) of rows with that text
+    current_hashes = {}   # courseid -> chunk hashes of its file in this run
+    if near_dups is not None and manifest_ready and jobs:
+        for hash_, fingerprint, owner in syllabus_dao.get_fingerprints():
+            near_dups.add(fingerprint, (hash_, owner))
+            owners.setdefault(hash_, []).append(owner)
+
+    if not dry_run:
+        write_queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        writer_failures = []
+        writer = threading.Thread(target=write_worker, args=(write_queue, stats, writer_failures),
+                                  name="syllabus-writer")
+        writer.start()
+
+    def send(item):
+        # A writer that has stopped would leave put() blocked forever once
+        # the queue is full
+        while True:
+            if writer_failures or not writer.is_alive():
+                raise RuntimeError(f"syllabus writer stopped: {writer_failures[0] if writer_failures else 'exited'}")
+            try:
+                write_queue.put(item, timeout=1.0)
+                return
+            except queue.Full:
+                pass
+
+    def make_pool():
+        # "spawn" keeps the parse workers from inheriting the encoder's torch threads
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=init_parse_worker, initargs=(max_worker_memory_mb,))
+
+    pool = make_pool()
+
+    model = None
+    disk_cache = None
+    if not dry_run and embedding_cache and DEFAULT_CACHE_DIR:
+        disk_cache = EmbeddingDiskCache(EMBEDDING_MODEL)
+
+    def encode(texts):
+        # Loaded on the first cache miss; a fully cached run never loads it
+        nonlocal model
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(EMBEDDING_MODEL)
+        # Unit-length vectors: retrieval ranks by inner product (cosine)
+        return model.encode(texts, batch_size=ENCODE_BATCH_SIZE, normalize_embeddings=True)
+
+    pending = []          # parsed files waiting to be encoded: (job, chunks, sources)
+    pending_chunks = 0
+    done = 0
+
+    def embed(texts):
+        """chunk_hash -> embedding of each text."""
+        embed_start = time.perf_counter()
+        vectors = disk_cache.encode(texts, encode) if disk_cache else encode(texts)
+        stats["embed"] += time.perf_counter() - embed_start
+        return dict(zip(map(chunk_hash, texts), vectors))
+
+    def source_embeddings(hashes):
+        """Embeddings of already encoded chunks, from the disk cache, else the database."""
+        hashes = list(hashes)
+        found = {}
+        if disk_cache:
+            for hash_, vector in zip(hashes, disk_cache.get_many([bytes.fromhex(h) for h in hashes])):
+                if vector is not None:
+                    found[hash_] = vector
+        missing = [h for h in hashes if h not in found]
+        if missing and manifest_ready:
+            found.update(syllabus_dao.get_embeddings(missing))
+        return found
+
+    def flush():
+        # sources[i] is the hash of the chunk whose embedding chunks[i]
+        # reuses, or None when chunks[i] is encoded itself
+        nonlocal pending, pending_chunks
+        if not pending or dry_run:
+            pending, pending_chunks = [], 0
+            return
+        pairs = [(chunk, source) for _, chunks, sources in pending for chunk, source in zip(chunks, sources)]
+        to_encode = [chunk for chunk, source in pairs if source is None]
+        vectors = embed(to_encode) if to_encode else {}
+        wanted = {source for _, source in pairs if source is not None and source not in vectors}
+        if wanted:
+            vectors.update(source_embeddings(wanted))
+        # A source that is gone by now: encode the chunk's own text after all
+        orphans = [chunk for chunk, source in pairs if source is not None and source not in vectors]
+        if orphans:
+            vectors.update(embed(orphans))
+
+        for job, chunks, sources in pending:
+            embeddings = [
+                vectors[source] if source in vectors else vectors[chunk_hash(chunk)]
+                for chunk, source in zip(chunks, sources)
+            ]
+            send((job, chunks, embeddings))
+        pending, pending_chunks = [], 0
 
-print("=" * 70)
-print("INGESTION COMPLETE!")
-print(f"Total chunks inserted: {total_inserted}")
-print("=" * 70)
+    try:
+        remaining = iter(jobs)
+        in_flight = {}
+        max_in_flight = workers * 2
+        # A worker that dies (native abort past RLIMIT_DATA, OOM kill) breaks
+        # the whole pool and fails every in-flight file. Those files are
+        # retried one at a time in a new pool; one that breaks it again alone
+        # is the culprit and is reported as an error.
+        suspects = deque()
+        retried = set()
+
+        def submit(job):
+            nonlocal pool
+            try:
+                future = pool.submit(extract_chunks, os.path.join(folder, job[0]), max_chars, timeout)
+            except BrokenProcessPool:
+                # Broke after the last wait(); its in-flight files are collected next
+                pool.shutdown(wait=False)
+                pool = make_pool()
+                future = pool.submit(extract_chunks, os.path.join(folder, job[0]), max_chars, timeout)
+            in_flight[future] = job
+
+        while True:
+            if suspects:
+                if not in_flight:
+                    job = suspects.popleft()
+                    retried.add(job[0])
+                    submit(job)
+            else:
+                for job in remaining:
+                    submit(job)
+                    if len(in_flight) >= max_in_flight:
+                        break
+            if not in_flight:
+                break
+
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in finished:
+                filename, courseid, content_hash = job = in_flight.pop(future)
+                try:
+                    chunks, seconds = future.result()
+                except BrokenProcessPool as e:
+                    broken = True
+                    if filename not in retried:
+                        suspects.append(job)
+                        continue
+                    done += 1
+                    stats["errors"] += 1
+                    print(f"[{done}/{len(jobs)}] Error parsing {filename}: parse worker died ({e})")
+                    continue
+                except Exception as e:
+                    done += 1
+                    stats["errors"] += 1
+                    print(f"[{done}/{len(jobs)}] Error parsing {filename}: {e}")
+                    continue
+                done += 1
+
+                stats["parse"] += seconds
+                if not chunks:
+                    print(f"[{done}/{len(jobs)}] {filename} → PDF text empty, skipping")
+                    continue
+
+                # Identical chunks within a file are stored once; chunks the
+                # course already has keep their existing rows and embeddings.
+                unique = {}
+                for chunk in chunks:
+                    unique.setdefault(chunk_hash(chunk), chunk)
+                existing = syllabus_dao.get_chunk_hashes(courseid) if manifest_ready else set()
+                candidates = [(h, c) for h, c in unique.items() if h not in existing]
+                stats["chunks"] += len(unique)
+                stats["reused"] += len(unique) - len(candidates)
+
+                # Text another course already stores is linked to its row.
+                # A near-duplicate only borrows that chunk's embedding: a few
+                # bits of SimHash can be a changed percentage, date or room,
+                # so it keeps its own text. Rows this run is replacing do not count.
+                links = []
+                new_chunks, sources = [], []
+                if near_dups is not None:
+                    current_hashes[courseid] = set(unique)
+
+                    def accept(item):
+                        hash_, owner = item
+                        return owner != courseid and (
+                            owner not in current_hashes or hash_ in current_hashes[owner]
+                        )
+
+                    for h, c in candidates:
+                        if any(accept((h, owner)) for owner in owners.get(h, ())):
+                            links.append(h)
+                            continue
+                        fingerprint = simhash(c)
+                        match = near_dups.find(fingerprint, accept)
+                        new_chunks.append(c)
+                        sources.append(match[0] if match is not None else None)
+                        if match is None:
+                            near_dups.add(fingerprint, (h, courseid))
+                        owners.setdefault(h, []).append(courseid)
+                else:
+                    new_chunks = [c for _, c in candidates]
+                    sources = [None] * len(new_chunks)
+                borrowed = sum(source is not None for source in sources)
+                stats["linked"] += len(links)
+                stats["borrowed"] += borrowed
+                print(f"[{done}/{len(jobs)}] {filename} → {len(unique)} chunks, "
+                      f"{len(new_chunks) - borrowed} to embed, {borrowed} near-duplicate, "
+                      f"{len(links)} shared (cid={courseid})")
+
+                job = {"filename": filename, "courseid": courseid, "content_hash": content_hash,
+                       "chunk_hashes": list(unique), "links": links}
+                pending.append((job, new_chunks, sources))
+                pending_chunks += len(new_chunks) - borrowed
+
+            if broken:
+                for future, job in in_flight.items():
+                    if job[0] in retried:
+                        stats["errors"] += 1
+                        done += 1
+                        print(f"[{done}/{len(jobs)}] Error parsing {job[0]}: parse worker died")
+                    else:
+                        suspects.append(job)
+                in_flight.clear()
+                pool.shutdown(wait=False)
+                pool = make_pool()
+
+            if pending_chunks >= batch_size:
+                flush()
+
+        flush()
+    finally:
+        pool.shutdown()
+        if not dry_run:
+            while writer.is_alive():
+                try:
+                    write_queue.put(None, timeout=1.0)
+                    break
+                except queue.Full:
+                    pass
+            writer.join()
+        syllabus_dao.close()
+    if not dry_run and writer_failures:
+        raise RuntimeError(f"syllabus writer stopped: {writer_failures[0]}") from writer_failures[0]
+
+    wall = time.perf_counter() - wall_start
+    metrics = {
+        "dry_run": dry_run,
+        "files_processed": len(jobs),
+        "files_unchanged": stats["skipped"],
+        "errors": stats["errors"],
+        "workers": workers,
+        "chunks": stats["chunks"],
+        "chunks_reused": stats["reused"],
+        "chunks_linked": stats["linked"],
+        "chunks_near_duplicate": stats["borrowed"],
+        "chunks_inserted": stats["inserted"],
+        "chunks_deleted": stats["deleted"],
+        "parse_seconds": round(stats["parse"], 3),
+        "embed_seconds": round(stats["embed"], 3),
+        "write_seconds": round(stats["write"], 3),
+        "wall_seconds": round(wall, 3),
+        "files_per_sec": round(len(jobs) / wall, 2) if wall else 0.0,
+        "chunks_per_sec": round(stats["chunks"] / wall, 1) if wall else 0.0,
+        "embed_chunks_per_sec": round((stats["chunks"] - stats["reused"] - stats["linked"] - stats["borrowed"]) / stats["embed"], 1) if stats["embed"] else 0.0,
+        "insert_rows_per_sec": round(stats["inserted"] / stats["write"], 1) if stats["write"] else 0.0,
+        "embedding_cache_hits": disk_cache.hits if disk_cache else 0,
+    }
+
+    print("=" * 70)
+    print("INGESTION COMPLETE!" if not dry_run else "DRY RUN COMPLETE (nothing written)")
+    print(f"Total chunks inserted: {stats['inserted']}  deleted: {stats['deleted']}  "
+          f"reused: {stats['reused']}  linked: {stats['linked']}  near-duplicate: {stats['borrowed']}")
+    print(f"Files: {len(jobs)} processed, {stats['skipped']} unchanged  "
+          f"errors: {stats['errors']}  workers: {workers}")
+    print(f"Parse (sum over workers): {stats['parse']:.1f}s  Embed: {stats['embed']:.1f}s  "
+          f"Write: {stats['write']:.1f}s  Wall: {wall:.1f}s")
+    print("=" * 70)
+    return metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest syllabus PDFs into the syllabus table")
+    parser.add_argument("--folder", default=DEFAULT_FOLDER, help="folder containing the syllabus PDFs")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_CHUNKS,
+                        help="chunks gathered across files before each encode call")
+    parser.add_argument("--workers", type=int, default=None, help="parse processes (default: CPU count)")
+    parser.add_argument("--dry-run", action="store_true", help="parse and report without writing")
+    parser.add_argument("--only", action="append", metavar="COURSE",
+                        help="only ingest this course, e.g. CIIC-4020 (repeatable)")
+    parser.add_argument("--force", action="store_true", help="re-process files even if unchanged")
+    parser.add_argument("--max-chars", type=int, default=MAX_PDF_CHARS,
+                        help="skip files with more extracted text than this")
+    parser.add_argument("--timeout", type=int, default=FILE_TIMEOUT,
+                        help="seconds allowed to parse one file (0 = no limit)")
+    parser.add_argument("--max-worker-memory-mb", type=int, default=MAX_WORKER_MEMORY_MB,
+                        help="memory ceiling of each parse process (0 = no limit)")
+    parser.add_argument("--no-embedding-cache", action="store_true",
+                        help="encode every new chunk instead of reusing cached vectors")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="do not share identical chunk text or near-duplicate embeddings across courses")
+    args = parser.parse_args(argv)
+
+    metrics = ingest(
+        folder=args.folder,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        dry_run=args.dry_run,
+        only=args.only,
+        force=args.force,
+        max_chars=args.max_chars,
+        timeout=args.timeout,
+        max_worker_memory_mb=args.max_worker_memory_mb,
+        embedding_cache=not args.no_embedding_cache,
+        dedup=not args.no_dedup,
+    )
+    # One machine-readable line for ops scripts
+    print(json.dumps(metrics))
+    return 1 if metrics["errors"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,5 +1,7 @@
 from flask import jsonify
+from app import bulk
 from app.dao.classes import ClassDAO
+from app.course_index import course_index
 
 
 class ClassHandler:
@@ -23,13 +25,11 @@ class ClassHandler:
             return jsonify(Error="Class Not Found"), 404
         return jsonify(Class=self.build_class_dict(row))
 
-    def createClass(self, class_json):
-        dao = ClassDAO()
-
+    def read_class(self, class_json, ccodes):
+        """(column values, None), or (None, (error, status)) for an invalid new class."""
         required = ["cname", "ccode", "cdesc", "term", "years", "cred", "csyllabus"]
         if not all(k in class_json for k in required):
-            dao.close()
-            return jsonify(Error="Invalid Request – missing fields"), 400
+            return None, ("Invalid Request – missing fields", 400)
 
         cname = class_json["cname"]
         ccode = class_json["ccode"]
@@ -39,27 +39,60 @@ class ClassHandler:
         cred = class_json["cred"]
         csyllabus = class_json["csyllabus"]
 
+        if not all(isinstance(v, str) for v in (ccode, term, years)) or not all(
+                v is None or isinstance(v, str) for v in (cname, cdesc, csyllabus)):
+            return None, ("Invalid Request – text fields must be strings", 400)
         if not ccode:
-            dao.close()
-            return jsonify(Error="ccode cannot be empty"), 409
+            return None, ("ccode cannot be empty", 409)
         if term not in {"First Semester", "Second Semester", "According to Demand"}:
-            dao.close()
-            return jsonify(Error="Invalid term value"), 409
+            return None, ("Invalid term value", 409)
         if years not in {"Every Year", "According to Demand", "Odd Years"}:
-            dao.close()
-            return jsonify(Error="Invalid years value"), 409
+            return None, ("Invalid years value", 409)
         if not isinstance(cred, int) or cred < 0:
+            return None, ("cred must be a non-negative integer", 409)
+        if ccode in ccodes:
+            return None, ("Duplicate ccode", 409)
+
+        return (cname, ccode, cdesc, term, years, cred, csyllabus), None
+
+    def createClass(self, class_json):
+        dao = ClassDAO()
+
+        values, error = self.read_class(class_json, dao.get_ccodes())
+        if error:
             dao.close()
-            return jsonify(Error="cred must be a non-negative integer"), 409
-        if ccode in dao.get_ccodes():
-            dao.close()
-            return jsonify(Error="Duplicate ccode"), 409
+            return jsonify(Error=error[0]), error[1]
 
-        cid = dao.create_class(cname, ccode, cdesc, term, years, cred, csyllabus)
+        cname, ccode, cdesc = values[:3]
+        cid = dao.create_class(*values)
+        course_index.upsert(cid, cname, ccode, cdesc)
 
-        result = self.build_class_dict((cid, cname, ccode, cdesc, term, years, cred, csyllabus))
+        result = self.build_class_dict((cid, *values))
         dao.close()
         return jsonify(Class=result), 201
+
+    def bulkCreateClasses(self, rows, errors, atomic):
+        dao = ClassDAO()
+        try:
+            ccodes = set(dao.get_ccodes())
+
+            def prepare(class_json):
+                values, error = self.read_class(class_json, ccodes)
+                if values:
+                    # Later rows in the batch may not reuse the ccode
+                    ccodes.add(values[1])
+                return values, error
+
+            def insert(values, skip_failed):
+                created, failed = dao.create_classes(values, skip_failed)
+                for cid, cname, ccode, cdesc, *_ in created:
+                    course_index.upsert(cid, cname, ccode, cdesc)
+                return [self.build_class_dict(row) for row in created], failed
+
+            return bulk.import_rows(rows, errors, atomic, prepare, insert)
+        finally:
+            dao.close()
+
     def updateClassById(self, cid, class_json):
         dao = ClassDAO()
         current_row = dao.get_class(cid)
@@ -102,6 +135,7 @@ class ClassHandler:
         dao.close()
         if not ok:
             return jsonify(Error="Update failed"), 500
+        course_index.upsert(cid, cname, ccode, cdesc)
 
         updated = self.build_class_dict(
             (cid, cname, ccode, cdesc, term, years, cred, csyllabus)
@@ -120,4 +154,5 @@ class ClassHandler:
 
         dao.delete_class(cid)
         dao.close()
+        course_index.remove(cid)
         return jsonify(DeleteStatus="OK"), 204
\ No newline at end of file
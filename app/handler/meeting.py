@@ -1,4 +1,5 @@
 ﻿from flask import jsonify
+from app import bulk
 from app.dao.meeting import MeetingDAO
 from datetime import datetime, time, date
 
@@ -75,28 +76,57 @@ class MeetingHandler:
             dao.delete_meeting(mid)
             return jsonify(DeleteStatus = "OK"), 204
 
-    def createMeeting(self, meeting_json):
-        dao = MeetingDAO()
-        ccode = meeting_json["ccode"]
-        starttime = datetime.fromisoformat(meeting_json["starttime"])
-        endtime = datetime.fromisoformat(meeting_json["endtime"])
-        cdays = meeting_json["cdays"]
+    def read_meeting(self, meeting_json, ccodes):
+        """((ccode, starttime, endtime, cdays), None), or (None, (error, status)) for an invalid new meeting."""
+        try:
+            ccode = meeting_json["ccode"]
+            starttime = datetime.fromisoformat(meeting_json["starttime"])
+            endtime = datetime.fromisoformat(meeting_json["endtime"])
+            cdays = meeting_json["cdays"]
+        except (KeyError, TypeError, ValueError):
+            return None, ("Invalid Request", 400)
 
-        if not all([ccode, starttime, endtime, cdays]):
-            dao.close()
-            return jsonify(Error="Invalid Request"), 400
+        if not all([ccode, starttime, endtime, cdays]) or not isinstance(ccode, str):
+            return None, ("Invalid Request", 400)
 
         if starttime >= endtime:
-            dao.close()
-            return jsonify(Error="Time Conflict"), 409
+            return None, ("Time Conflict", 409)
         if cdays not in ["MJ", "LMV"]:
+            return None, ("Invalid cdays value", 409)
+        if ccode in ccodes:
+            return None, ("Duplicate ccode", 409)
+
+        return (ccode, starttime, endtime, cdays), None
+
+    def createMeeting(self, meeting_json):
+        dao = MeetingDAO()
+
+        values, error = self.read_meeting(meeting_json, dao.get_ccodes())
+        if error:
             dao.close()
-            return jsonify(Error="Invalid cdays value"), 409
-        if ccode in dao.get_ccodes():
-            dao.close()
-            return jsonify(Error="Duplicate ccode"), 409
+            return jsonify(Error=error[0]), error[1]
 
-        mid = dao.create_meeting(ccode, starttime, endtime, cdays)
-        result = self.build_meeting_dict((mid, ccode, starttime, endtime, cdays))
+        mid = dao.create_meeting(*values)
+        result = self.build_meeting_dict((mid, *values))
         dao.close()
         return jsonify(Meeting=result), 201
+
+    def bulkCreateMeetings(self, rows, errors, atomic):
+        dao = MeetingDAO()
+        try:
+            ccodes = set(dao.get_ccodes())
+
+            def prepare(meeting_json):
+                values, error = self.read_meeting(meeting_json, ccodes)
+                if values:
+                    # Later rows in the batch may not reuse the ccode
+                    ccodes.add(values[0])
+                return values, error
+
+            def insert(values, skip_failed):
+                created, failed = dao.create_meetings(values, skip_failed)
+                return [self.build_meeting_dict(row) for row in created], failed
+
+            return bulk.import_rows(rows, errors, atomic, prepare, insert)
+        finally:
+            dao.close()
@@ -1,5 +1,6 @@
 # app/handler/rooms.py
 from flask import jsonify
+from app import bulk
 from app.dao.rooms import RoomDAO
 
 
@@ -19,31 +20,63 @@ class RoomHandler:
             return jsonify(Error="Room Not Found"), 404
         return jsonify(Room=self.build_room_dict(row))
 
-    def createRoom(self, room_json):
-        dao = RoomDAO()
-
+    def read_room(self, room_json, locations):
+        """((building, room_number, capacity), None), or (None, (error, status)) for an invalid new room."""
         required = ["building", "room_number", "capacity"]
         if not all(k in room_json for k in required):
-            return jsonify(Error="Missing required fields"), 400
+            return None, ("Missing required fields", 400)
 
         building = room_json["building"]
         room_number = room_json["room_number"]
         capacity = room_json["capacity"]
 
+        if not isinstance(building, str) or not isinstance(room_number, str):
+            return None, ("building and room_number must be strings", 400)
+
         if not building or not room_number:
-            return jsonify(Error="building and room_number cannot be empty"), 400
+            return None, ("building and room_number cannot be empty", 400)
 
         if not isinstance(capacity, int) or capacity < 0:
-            return jsonify(Error="capacity must be a non-negative integer"), 400
+            return None, ("capacity must be a non-negative integer", 400)
 
-        if (building, room_number) in dao.get_room_locations():
-            return jsonify(Error="Room (building, room_number) already exists"), 409
+        if (building, room_number) in locations:
+            return None, ("Room (building, room_number) already exists", 409)
 
-        rid = dao.create_room(building, room_number, capacity)
-        result = self.build_room_dict((rid, building, room_number, capacity))
+        return (building, room_number, capacity), None
+
+    def createRoom(self, room_json):
+        dao = RoomDAO()
+
+        values, error = self.read_room(room_json, dao.get_room_locations())
+        if error:
+            dao.close()
+            return jsonify(Error=error[0]), error[1]
+
+        rid = dao.create_room(*values)
+        result = self.build_room_dict((rid, *values))
         dao.close()
         return jsonify(Room=result), 201   # ← Antes solo {rid: X}
 
+    def bulkCreateRooms(self, rows, errors, atomic):
+        dao = RoomDAO()
+        try:
+            locations = dao.get_room_locations()
+
+            def prepare(room_json):
+                values, error = self.read_room(room_json, locations)
+                if values:
+                    # Later rows in the batch may not reuse the location
+                    locations.add(values[:2])
+                return values, error
+
+            def insert(values, skip_failed):
+                created, failed = dao.create_rooms(values, skip_failed)
+                return [self.build_room_dict(row) for row in created], failed
+
+            return bulk.import_rows(rows, errors, atomic, prepare, insert)
+        finally:
+            dao.close()
+
     def updateRoomById(self, rid, room_json):
         dao = RoomDAO()
         current_row = dao.get_room(rid)
@@ -1,8 +1,19 @@
 ﻿from flask import jsonify
+from app import bulk
 from app.dao.section import SectionDAO
 
 
+def is_key(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
 class SectionHandler:
+    CHECK_ERRORS = {
+        "foreign_key": "Foreign Key does not exist",
+        "capacity": "Over room capacity",
+        "format": "Invalid Semester or Years Format",
+        "schedule": "Scheduling Conflict",
+    }
 
     def build_section_dict(self, row):
         result = {}
@@ -26,6 +37,21 @@ class SectionHandler:
         result['capacity'] = capacity
         return result
 
+    def build_check_error(self, failed):
+        return jsonify(Error=self.CHECK_ERRORS[failed], Check=failed), 409
+
+    def read_section(self, section_json):
+        """(roomid, cid, mid, semester, years, capacity) with semester capitalized, or None."""
+        try:
+            semester = section_json["semester"]
+            if not isinstance(semester, str):
+                return None
+            semester = semester[0].upper() + semester[1:].lower()
+            return (section_json["roomid"], section_json["cid"], section_json["mid"],
+                    semester, section_json["years"], section_json["capacity"])
+        except (KeyError, TypeError, IndexError):
+            return None
+
     def getSectionById(self, sid):
         dao = SectionDAO()
         row = dao.get_section(sid)
@@ -45,30 +71,15 @@ class SectionHandler:
         years = section_json["years"]
         capacity = section_json["capacity"]
 
-        # Foreign key checks
-        if cid not in dao.check_cid_existence(cid) or \
-           roomid not in dao.check_roomid_existence(roomid) or \
-           mid not in dao.check_mid_existence(mid):
-            return jsonify(Error="Foreign Key does not exist"), 409
+        valid_format = semester in ["Fall", "Spring", "V1", "V2"] and years.isdigit() and len(years) == 4
 
-        # Capacity check (fixed logic)
-        elif not dao.check_capacity(roomid, capacity):
-            return jsonify(Error="Over room capacity"), 409
-
-        # Semester and years validation
-        elif semester not in ["Fall", "Spring", "V1", "V2"] or not (years.isdigit() and len(years) == 4):
-            return jsonify(Error="Invalid Semester or Years Format"), 409
-
-        # Scheduling conflict check (pass 0 for new section)
-        elif not dao.check_scheduling_conflict(0, roomid, mid, semester, years):
-            return jsonify(Error="Scheduling Conflict"), 409
-
-        else:
-            sid = dao.create_section(roomid, cid, mid, semester, years, capacity)
-            row = dao.get_section(sid)
-            result = self.build_section_dict(row)
-            dao.close()
-            return jsonify(Section=result), 201  # ← antes solo {Sid: X}
+        # Checks and insert run as one statement
+        row, failed = dao.save_section(None, roomid, cid, mid, semester, years, capacity, valid_format)
+        dao.close()
+        if failed:
+            return self.build_check_error(failed)
+        result = self.build_section_dict(row)
+        return jsonify(Section=result), 201  # ← antes solo {Sid: X}
 
     def updateSectionById(self, sid, section_json):
         dao = SectionDAO()
@@ -81,34 +92,72 @@ class SectionHandler:
         years = section_json["years"]
         capacity = section_json["capacity"]
 
-        # Foreign key checks
-        if cid not in dao.check_cid_existence(cid) or \
-           roomid not in dao.check_roomid_existence(roomid) or \
-           mid not in dao.check_mid_existence(mid):
-            return jsonify(Error="Foreign Key does not exist"), 409
-
-        # Capacity check
-        elif not dao.check_capacity(roomid, capacity):
-            return jsonify(Error="Over room capacity"), 409
-
-        # Semester and years validation
-        elif semester not in ["Fall", "Spring", "V1", "V2"] or not (years.isdigit() and len(years) == 4):
-            return jsonify(Error="Invalid Semester or Years Format"), 409
-
-        # Scheduling conflict check
-        elif not dao.check_scheduling_conflict(sid, roomid, mid, semester, years):
-            return jsonify(Error="Scheduling Conflict"), 409
-
-        else:
-            ok = dao.update_section(sid, roomid, cid, mid, semester, years, capacity)
-            if ok:
-                row = dao.get_section(sid)
-                result = self.build_section_dict(row)
-                dao.close()
-                return jsonify(Section=result), 200  # ← antes {UpdateStatus: True}
-            else:
-                dao.close()
-                return jsonify(Error="Update failed"), 500
+        valid_format = semester in ["Fall", "Spring", "V1", "V2"] and years.isdigit() and len(years) == 4
+
+        # Checks and update run as one statement
+        row, failed = dao.save_section(sid, roomid, cid, mid, semester, years, capacity, valid_format)
+        dao.close()
+        if failed:
+            return self.build_check_error(failed)
+        elif row is None:
+            return jsonify(Error="Update failed"), 500
+        result = self.build_section_dict(row)
+        return jsonify(Section=result), 200  # ← antes {UpdateStatus: True}
+
+    def bulkCreateSections(self, rows, errors, atomic):
+        dao = SectionDAO()
+        try:
+            sections = []
+            for index, section_json in rows:
+                values = self.read_section(section_json)
+                if values is None:
+                    errors.append(bulk.row_error(index, "Invalid Request", 400))
+                else:
+                    sections.append((index, values))
+
+            # save_section's per-room/term locks, so the slots loaded below
+            # stay current until the insert commits
+            roomids = {values[0] for _, values in sections if is_key(values[0])}
+            dao.lock_schedules({(values[0], f"{values[3]}/{values[4]}")
+                                for _, values in sections if is_key(values[0])})
+            class_ids = dao.get_class_ids()
+            capacities = dao.get_room_capacities()
+            meeting_days = dao.get_meeting_days()
+            slots = dao.get_scheduled_slots(roomids)
+
+            def prepare(values):
+                roomid, cid, mid, semester, years, capacity = values
+                # Same checks, in the same order, as save_section
+                if not (is_key(cid) and cid in class_ids and is_key(roomid) and roomid in capacities
+                        and is_key(mid) and mid in meeting_days):
+                    failed = "foreign_key"
+                else:
+                    try:
+                        fits = int(capacity) <= capacities[roomid]
+                    except (TypeError, ValueError):
+                        fits = False
+                    slot = (roomid, meeting_days[mid], semester, years)
+                    if not fits:
+                        failed = "capacity"
+                    elif semester not in ["Fall", "Spring", "V1", "V2"] or not (
+                            isinstance(years, str) and years.isdigit() and len(years) == 4):
+                        failed = "format"
+                    elif slot in slots:
+                        failed = "schedule"
+                    else:
+                        # Later rows in the batch conflict with this one too
+                        slots.add(slot)
+                        return values, None
+                return None, (self.CHECK_ERRORS[failed], 409)
+
+            def insert(values, skip_failed):
+                created, failed = dao.create_sections(values, skip_failed)
+                return [self.build_section_dict(row) for row in created], failed
+
+            return bulk.import_rows(sections, errors, atomic, prepare, insert)
+        finally:
+            # Rolls back and releases the locks when nothing was written
+            dao.close()
 
     def deleteSectionById(self, sid):
         dao = SectionDAO()
@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict
+
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """
+    Answers to previous questions, keyed by resolved courseid plus the
+    question embedding. A lookup hits when a cached question for the same
+    course has cosine similarity >= threshold with the new one.
+    Entries expire after ttl seconds and the least recently used entry is
+    evicted once max_entries is reached.
+    """
+
+    def __init__(self, threshold: float = 0.95, ttl: float = 3600, max_entries: int = 1024):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._lru = OrderedDict()      # entry id -> courseid, oldest first
+        self._by_course = {}           # courseid -> {entry id: (vector, answer, expires_at)}
+        self._next_id = 0
+        # Bumped by invalidate(); a put() computed before that is dropped
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, courseid, embedding):
+        """Return the cached answer for a similar question, or None."""
+        vector = self._normalize(embedding)
+        now = time.monotonic()
+        with self._lock:
+            entries = self._by_course.get(courseid)
+            if entries:
+                expired = [eid for eid, entry in entries.items() if entry[2] <= now]
+                for eid in expired:
+                    self._remove(eid)
+                entries = self._by_course.get(courseid)
+            if not entries:
+                self.misses += 1
+                return None
+
+            ids = list(entries)
+            matrix = np.stack([entries[eid][0] for eid in ids])
+            scores = matrix @ vector
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            eid = ids[best]
+            self._lru.move_to_end(eid)
+            self.hits += 1
+            return entries[eid][1]
+
+    def put(self, courseid, embedding, answer, generation: int = None) -> None:
+        """Cache an answer; pass the generation read before retrieval to skip it if stale."""
+        vector = self._normalize(embedding)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            eid = self._next_id
+            self._next_id += 1
+            self._by_course.setdefault(courseid, {})[eid] = (vector, answer, time.monotonic() + self.ttl)
+            self._lru[eid] = courseid
+            while len(self._lru) > self.max_entries:
+                self._remove(next(iter(self._lru)))
+
+    def invalidate(self, courseid) -> None:
+        """
+        Drop the answers for a course whose syllabus changed, along with the
+        answers to questions that were not tied to any course.
+        """
+        with self._lock:
+            self.generation += 1
+            for key in {courseid, None}:
+                for eid in list(self._by_course.get(key, ())):
+                    self._remove(eid)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+            self._by_course.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._lru),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, eid) -> None:
+        courseid = self._lru.pop(eid)
+        entries = self._by_course[courseid]
+        del entries[eid]
+        if not entries:
+            del self._by_course[courseid]
+
+
+class SyllabusChangeWatcher:
+    """
+    Invalidates cached answers for courses whose syllabus was re-ingested or
+    removed by another process (python -m app.filehandler). load_versions
+    returns courseid -> version (the manifest's ingestion time); it is polled
+    from lookups at most once per interval seconds.
+    """
+
+    def __init__(self, cache: SemanticAnswerCache, load_versions: Callable[[], Dict], interval: float = 5.0):
+        self.cache = cache
+        self.load_versions = load_versions
+        self.interval = interval
+        self._versions = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def check(self) -> None:
+        if time.monotonic() < self._next_check:
+            return
+        # One thread polls; the others go on with what is cached
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() < self._next_check:
+                return
+            self._next_check = time.monotonic() + self.interval
+            try:
+                versions = self.load_versions()
+            except Exception as e:
+                print(f"Syllabus version check failed: {e}")
+                return
+            if self._versions is not None:
+                for courseid in set(versions) | set(self._versions):
+                    if versions.get(courseid) != self._versions.get(courseid):
+                        self.cache.invalidate(courseid)
+            self._versions = versions
+        finally:
+            self._lock.release()
@@ -1,42 +1,58 @@
-from app.dao.syllabus import SyllabusDAO
-from sentence_transformers import SentenceTransformer
+import os
+import re
+import threading
+from typing import List, Tuple
+
+from app.course_index import course_index
+from app.dao.syllabus import SyllabusDAO, chunk_write_listeners
+from app.llm.answer_cache import SemanticAnswerCache, SyllabusChangeWatcher
+from app.llm.context import select_context
+from app.llm.embedcache import DEFAULT_CACHE_DIR, EmbeddingDiskCache
+from app.llm.embedding import EmbeddingService
 from langchain_ollama import ChatOllama
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
-embedder = SentenceTransformer("all-mpnet-base-v2")
+EMBEDDING_MODEL = "all-mpnet-base-v2"
 
+_embedder = None
+_embedder_lock = threading.Lock()
 
-class ChatOllamaBot:
-    def __init__(self):
-        self.dao = SyllabusDAO()
 
-    def ask(self, question: str) -> str:
-        courseid = None
+def get_embedder():
+    """Load the SentenceTransformer the first time it is needed."""
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                from sentence_transformers import SentenceTransformer
+                _embedder = SentenceTransformer(EMBEDDING_MODEL)
+    return _embedder
 
-        import re
 
-        match = re.search(r"([A-Z]{2,4})[-\s]?(\d{3,4})", question)
-        if match:
-            cname, ccode = match.group(1), match.group(2)
-            courseid = self.dao.find_course(cname=cname, ccode=ccode)
-        else:
-            match_desc = re.search(r"(?:course|class)\s+([\w\s]+)", question, re.IGNORECASE)
-            if match_desc:
-                cdesc = match_desc.group(1).strip()
-                courseid = self.dao.find_course(cdesc=cdesc)
-
-        emb = embedder.encode(question).tolist()
-
-        chunks = self.dao.get_relevant_chunks(emb, courseid=courseid, limit=20)
-        if not chunks:
-            return "I couldn't find that information in the syllabus."
+embedding_service = EmbeddingService(
+    get_embedder,
+    max_batch=int(os.environ.get("EMBEDDING_MAX_BATCH", 32)),
+    max_wait=float(os.environ.get("EMBEDDING_MAX_WAIT_MS", 5)) / 1000,
+    cache_size=int(os.environ.get("EMBEDDING_CACHE_SIZE", 2048)),
+    # Stored chunk embeddings are unit length and retrieval ranks by inner product
+    normalize=True,
+    # Read-only: questions are not added, so the files and each worker's key
+    # index stay the size of what ingestion stored
+    disk_cache=EmbeddingDiskCache(EMBEDDING_MODEL, read_only=True, refresh_interval=60)
+    if DEFAULT_CACHE_DIR else None,
+)
 
-        context_texts = [chunk[0] for chunk in chunks]
-        documents = "\n".join(context_texts)
+# Models the chatbot can answer with. The key is what callers ask for,
+# the value holds the ChatOllama settings for that model.
+LLM_MODELS = {
+    "llama3.2": {"model": "llama3.2", "temperature": 0},
+}
+DEFAULT_MODEL = os.environ.get("CHATBOT_MODEL", "llama3.2")
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST")
 
-        prompt = PromptTemplate(
-            template="""You are an assistant for question-answering tasks at UPR-Mayagüez.
+PROMPT = PromptTemplate(
+    template="""You are an assistant for question-answering tasks at UPR-Mayagüez.
 Use the following syllabus excerpts to answer the question.
 If you don't know the answer, just say: "I couldn't find that information in the syllabus."
 Keep the answer concise and professional.
@@ -47,11 +63,167 @@ Syllabus excerpts:
 Question: {question}
 
 Answer:""",
-            input_variables=["documents", "question"],
-        )
+    input_variables=["documents", "question"],
+)
+
+NOT_FOUND_ANSWER = "I couldn't find that information in the syllabus."
+RETRIEVAL_LIMIT = int(os.environ.get("CHATBOT_RETRIEVAL_LIMIT", 20))
+# Retrieved chunks are candidates; only the nearest ones that fit in the
+# token budget and are within MAX_DISTANCE (cosine) go into the prompt.
+CONTEXT_TOKENS = int(os.environ.get("CHATBOT_CONTEXT_TOKENS", 1024))
+MAX_DISTANCE = float(os.environ.get("CHATBOT_MAX_DISTANCE", 0.7))
+# "hybrid" fuses vector and full-text rankings (exact terms like course
+# codes or "attendance"); "vector" uses embeddings only.
+RETRIEVAL_MODE = os.environ.get("CHATBOT_RETRIEVAL", "hybrid")
+
+answer_cache = SemanticAnswerCache(
+    threshold=float(os.environ.get("ANSWER_CACHE_THRESHOLD", 0.95)),
+    ttl=float(os.environ.get("ANSWER_CACHE_TTL", 3600)),
+    max_entries=int(os.environ.get("ANSWER_CACHE_SIZE", 1024)),
+)
+chunk_write_listeners.append(answer_cache.invalidate)
+
+
+def _load_syllabus_versions():
+    with SyllabusDAO() as dao:
+        return dao.get_syllabus_versions()
+
+
+# Ingestion runs in its own process, so its listener calls never reach this
+# one; re-ingested courses are noticed by polling the manifest instead.
+syllabus_watcher = SyllabusChangeWatcher(
+    answer_cache,
+    _load_syllabus_versions,
+    interval=float(os.environ.get("ANSWER_CACHE_CHECK_SECONDS", 5)),
+)
+
+_chains = {}
+_chains_lock = threading.Lock()
+
+
+def get_chain(model_name: str = None):
+    """
+    Return the prompt | llm | parser chain for a registered model.
+    Chains are built once per process, so every question reuses the same
+    ChatOllama client and its HTTP connection to the Ollama server.
+    """
+    model_name = model_name or DEFAULT_MODEL
+    chain = _chains.get(model_name)
+    if chain is not None:
+        return chain
+
+    if model_name not in LLM_MODELS:
+        raise ValueError(f"Unknown chatbot model: {model_name}")
+
+    with _chains_lock:
+        chain = _chains.get(model_name)
+        if chain is None:
+            settings = dict(LLM_MODELS[model_name])
+            if OLLAMA_HOST:
+                settings.setdefault("base_url", OLLAMA_HOST)
+            llm = ChatOllama(**settings)
+            chain = PROMPT | llm | StrOutputParser()
+            _chains[model_name] = chain
+    return chain
+
+
+def preload():
+    """
+    Load model weights before gunicorn forks (PRELOAD_MODELS=1 with --preload)
+    so workers share them copy-on-write instead of each loading a copy.
+    """
+    import gc
+    get_embedder()
+    # Keep the preloaded objects out of later GC passes, which would
+    # otherwise touch their pages and un-share them in every worker.
+    gc.freeze()
+
+
+class ChatOllamaBot:
+    def __init__(self, model_name: str = None):
+        self.chain = get_chain(model_name)
+
+    def _resolve_course(self, question: str):
+        match = re.search(r"([A-Z]{2,4})[-\s]?(\d{3,4})", question)
+        if match:
+            cname, ccode = match.group(1), match.group(2)
+            return course_index.find(cname, ccode)
+
+        match_desc = re.search(r"(?:course|class)\s+([\w\s]+)", question, re.IGNORECASE)
+        if match_desc:
+            cdesc = match_desc.group(1).strip()
+            return course_index.find_by_description(cdesc)
+        return None
+
+    def _build_documents(self, question, emb, courseid):
+        """Retrieve the course's chunks and select the prompt context. Returns (documents, chunk ids)."""
+        # One pooled connection per question; the bot is shared by request threads
+        with SyllabusDAO() as dao:
+            if RETRIEVAL_MODE == "hybrid":
+                chunks = dao.get_hybrid_chunks(emb, question, courseid=courseid, limit=RETRIEVAL_LIMIT)
+            else:
+                chunks = dao.get_relevant_chunks(emb, courseid=courseid, limit=RETRIEVAL_LIMIT)
+        texts, chunk_ids = select_context(chunks, CONTEXT_TOKENS, MAX_DISTANCE)
+        if not texts:
+            return None, []
+        return "\n".join(texts), chunk_ids
+
+    def ask(self, question: str) -> str:
+        return self.ask_with_sources(question)[0]
+
+    def ask_with_sources(self, question: str) -> Tuple[str, List[int]]:
+        """The answer and the ids of the chunks it was generated from."""
+        courseid = self._resolve_course(question)
+        emb = embedding_service.encode(question)
+
+        syllabus_watcher.check()
+        generation = answer_cache.generation
+        cached = answer_cache.get(courseid, emb)
+        if cached is not None:
+            return cached
+
+        documents, chunk_ids = self._build_documents(question, emb, courseid)
+        if documents is None:
+            answer = NOT_FOUND_ANSWER
+        else:
+            answer = self.chain.invoke({"documents": documents, "question": question}).strip()
+
+        answer_cache.put(courseid, emb, (answer, chunk_ids), generation)
+        return answer, chunk_ids
+
+    def stream(self, question: str, sources: List[int] = None):
+        """
+        Yield the answer token by token as the LLM produces it. The ids of
+        the context chunks are appended to sources, if given.
+        """
+        courseid = self._resolve_course(question)
+        emb = embedding_service.encode(question)
+
+        syllabus_watcher.check()
+        generation = answer_cache.generation
+        cached = answer_cache.get(courseid, emb)
+        if cached is not None:
+            answer, chunk_ids = cached
+            if sources is not None:
+                sources.extend(chunk_ids)
+            yield answer
+            return
+
+        documents, chunk_ids = self._build_documents(question, emb, courseid)
+        if sources is not None:
+            sources.extend(chunk_ids)
+        if documents is None:
+            answer_cache.put(courseid, emb, (NOT_FOUND_ANSWER, []), generation)
+            yield NOT_FOUND_ANSWER
+            return
 
-        llm = ChatOllama(model="llama3.2", temperature=0)
-        chain = prompt | llm | StrOutputParser()
+        tokens = []
+        for token in self.chain.stream({"documents": documents, "question": question}):
+            if not tokens:
+                token = token.lstrip()
+                if not token:
+                    continue
+            tokens.append(token)
+            yield token
 
-        answer = chain.invoke({"documents": documents, "question": question})
-        return answer.strip()
+        answer_cache.put(courseid, emb, ("".join(tokens).strip(), chunk_ids), generation)
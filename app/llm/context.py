@@ -0,0 +1,42 @@
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from app.dedup import MAX_DISTANCE as NEAR_DUPLICATE_BITS, distance as bit_distance, simhash
+
+# Rough size of a token for English text with the Llama tokenizer
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def select_context(
+    chunks: Sequence[Tuple[int, str, Optional[int], float]],
+    token_budget: int,
+    max_distance: Optional[float] = None,
+    count_tokens: Callable[[str], int] = estimate_tokens,
+) -> Tuple[List[str], List[int]]:
+    """
+    Pick the prompt context from retrieved (chunkid, chunk, courseid, distance)
+    rows, best first. Chunks farther than max_distance and near-duplicates
+    of an already selected chunk are skipped; selection stops at the first
+    chunk that would exceed token_budget. The first chunk that passes the
+    checks is always kept. Returns (texts, chunk ids).
+    """
+    texts, chunk_ids, fingerprints = [], [], []
+    used = 0
+    for chunkid, chunk, _, distance in chunks:
+        if max_distance is not None and distance > max_distance:
+            # Hybrid rankings are not sorted by distance, so keep looking
+            continue
+        fingerprint = simhash(chunk)
+        if any(bit_distance(fingerprint, other) <= NEAR_DUPLICATE_BITS for other in fingerprints):
+            continue
+        tokens = count_tokens(chunk)
+        if texts and used + tokens > token_budget:
+            break
+        texts.append(chunk)
+        chunk_ids.append(chunkid)
+        fingerprints.append(fingerprint)
+        used += tokens
+    return texts, chunk_ids
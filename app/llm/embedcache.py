@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:   # Windows: appends are only serialized within a process
+    fcntl = None
+
+# Set EMBEDDING_DISK_CACHE_DIR to an empty string to disable the cache
+DEFAULT_CACHE_DIR = os.environ.get(
+    "EMBEDDING_DISK_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "syllabus-chatbot", "embeddings"),
+)
+
+KEY_SIZE = 32   # sha256 digest
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingDiskCache:
+    """
+    Persistent embedding cache shared by ingestion and the chatbot.
+
+    Each model gets three files in directory:
+      <model>.keys  – sha256 digests of the encoded texts, 32 bytes per row
+      <model>.f32   – the vectors, float32, memory-mapped for reads
+      <model>.json  – the vector dimension
+    Rows are only ever appended, so row i of .keys belongs to row i of .f32.
+    Appends take an exclusive file lock, and other processes pick up new
+    rows the next time they miss, at most once per refresh_interval seconds.
+
+    With read_only=True, texts that miss are encoded but not stored. The
+    chatbot uses the cache this way: it benefits from what ingestion stored
+    without growing the files, and every worker's key index, by one row per
+    distinct question.
+    """
+
+    def __init__(self, model_name: str, directory: str = DEFAULT_CACHE_DIR, normalized: bool = True,
+                 read_only: bool = False, refresh_interval: float = 0.0):
+        self.model_name = model_name
+        self.directory = directory
+        self.read_only = read_only
+        self.refresh_interval = refresh_interval
+        # Normalized and raw vectors of the same model must not be mixed
+        stem = re.sub(r"[^\w.-]", "_", model_name) + (".norm" if normalized else "")
+        base = os.path.join(directory, stem)
+        self._keys_path = base + ".keys"
+        self._vectors_path = base + ".f32"
+        self._meta_path = base + ".json"
+
+        self._lock = threading.Lock()
+        self._rows = {}          # digest -> row
+        self._keys_size = 0      # bytes of .keys already read
+        self._dim = None
+        self._vectors = None     # np.memmap over the rows read so far
+        self._next_refresh = 0.0
+        self.hits = 0
+        self.misses = 0
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def encode(self, texts, encode_fn) -> np.ndarray:
+        """
+        Vectors for texts, calling encode_fn only for the texts that are not
+        cached yet; encode_fn takes a list of texts and returns a 2-D array.
+        """
+        texts = list(texts)
+        keys = [text_key(text) for text in texts]
+        found = self.get_many(keys)
+
+        missing = [i for i, vector in enumerate(found) if vector is None]
+        if missing:
+            # Duplicate texts in one call are encoded once
+            unique = {}
+            for i in missing:
+                unique.setdefault(keys[i], texts[i])
+            vectors = np.asarray(encode_fn(list(unique.values())), dtype=np.float32)
+            if not self.read_only:
+                self.put_many(list(unique), vectors)
+            by_key = dict(zip(unique, vectors))
+            for i in missing:
+                found[i] = by_key[keys[i]]
+
+        if not found:
+            return np.empty((0, self._dim or 0), dtype=np.float32)
+        return np.stack(found)
+
+    def get_many(self, keys):
+        with self._lock:
+            self._refresh()
+            if any(key not in self._rows for key in keys) and time.monotonic() >= self._next_refresh:
+                # Another process may have appended them since the last read
+                self._refresh(force=True)
+                self._next_refresh = time.monotonic() + self.refresh_interval
+            result = []
+            for key in keys:
+                row = self._rows.get(key)
+                if row is None:
+                    self.misses += 1
+                    result.append(None)
+                else:
+                    self.hits += 1
+                    result.append(np.array(self._vectors[row]))
+            return result
+
+    def put_many(self, keys, vectors) -> None:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if not len(keys):
+            return
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._keys_path, "ab") as keys_file:
+                if fcntl is not None:
+                    fcntl.flock(keys_file, fcntl.LOCK_EX)
+                try:
+                    self._refresh(force=True)
+                    if self._dim is None:
+                        self._dim = vectors.shape[1]
+                        with open(self._meta_path, "w") as meta:
+                            json.dump({"model": self.model_name, "dim": self._dim}, meta)
+                    elif vectors.shape[1] != self._dim:
+                        raise ValueError(f"Expected {self._dim}-dimensional vectors, got {vectors.shape[1]}")
+
+                    new = [(key, vector) for key, vector in zip(keys, vectors) if key not in self._rows]
+                    if not new:
+                        return
+                    # Drop anything left behind by a writer that died mid-append
+                    rows = self._keys_size // KEY_SIZE
+                    keys_file.truncate(rows * KEY_SIZE)
+                    with open(self._vectors_path, "ab") as vectors_file:
+                        vectors_file.truncate(rows * self._dim * 4)
+                        vectors_file.write(np.stack([vector for _, vector in new]).tobytes())
+                        vectors_file.flush()
+                    keys_file.write(b"".join(key for key, _ in new))
+                    keys_file.flush()
+                    self._refresh(force=True)
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(keys_file, fcntl.LOCK_UN)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._rows),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _reset_after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+    def _refresh(self, force: bool = False) -> None:
+        """Read rows appended to the files since the last refresh."""
+        if self._vectors is not None and not force:
+            return
+        try:
+            keys_size = os.path.getsize(self._keys_path)
+        except OSError:
+            return
+        if keys_size < KEY_SIZE or keys_size == self._keys_size:
+            return
+        if self._dim is None:
+            with open(self._meta_path) as meta:
+                self._dim = json.load(meta)["dim"]
+
+        rows = keys_size // KEY_SIZE
+        with open(self._keys_path, "rb") as keys_file:
+            keys_file.seek(self._keys_size)
+            data = keys_file.read(rows * KEY_SIZE - self._keys_size)
+        start = self._keys_size // KEY_SIZE
+        for i in range(len(data) // KEY_SIZE):
+            self._rows.setdefault(data[i * KEY_SIZE:(i + 1) * KEY_SIZE], start + i)
+        self._keys_size = rows * KEY_SIZE
+        if rows:
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self._dim))
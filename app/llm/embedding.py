@@ -0,0 +1,143 @@
+import os
+import queue
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+
+def normalize_text(text: str) -> str:
+    """Cache key for a question: lower-cased with whitespace collapsed."""
+    return " ".join(text.lower().split())
+
+
+class EmbeddingService:
+    """
+    Encodes questions on one dedicated thread. Requests that arrive within
+    max_wait seconds of each other are grouped into a single model.encode
+    call of up to max_batch texts, and results are kept in an LRU cache
+    keyed by normalized question text.
+
+    load_model is called on the encoder thread the first time a question
+    needs encoding, so creating the service does not load the model.
+    With normalize=True the returned vectors have unit length.
+    Texts missing from the LRU are looked up in disk_cache (an
+    EmbeddingDiskCache) before the model is asked to encode them.
+    """
+
+    def __init__(self, load_model, max_batch: int = 32, max_wait: float = 0.005, cache_size: int = 2048,
+                 normalize: bool = False, disk_cache=None):
+        self.load_model = load_model
+        self.normalize = normalize
+        self.disk_cache = disk_cache
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.batch_sizes = Counter()
+        # The encoder thread does not survive fork(); start a fresh one in
+        # each gunicorn worker instead of inheriting a dead handle.
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def encode(self, text: str) -> np.ndarray:
+        key = normalize_text(text)
+        with self._cache_lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return vector
+            self.misses += 1
+
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((key, text, future))
+        return future.result()
+
+    def stats(self) -> dict:
+        with self._cache_lock:
+            lookups = self.hits + self.misses
+            return {
+                "cache_entries": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "batches": sum(self.batch_sizes.values()),
+                "batch_sizes": dict(sorted(self.batch_sizes.items())),
+            }
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="embedding-service", daemon=True)
+                self._thread.start()
+
+    def _reset_after_fork(self) -> None:
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        model = None
+
+        def encode(texts):
+            nonlocal model
+            if model is None:
+                model = self.load_model()
+            return model.encode(texts, batch_size=len(texts), normalize_embeddings=self.normalize)
+
+        while True:
+            batch = self._next_batch()
+
+            # Identical questions in the same batch are encoded once
+            pending = OrderedDict()
+            for key, text, future in batch:
+                pending.setdefault(key, (text, []))[1].append(future)
+
+            texts = [text for text, _ in pending.values()]
+            try:
+                if self.disk_cache is not None:
+                    vectors = self.disk_cache.encode(texts, encode)
+                else:
+                    vectors = encode(texts)
+            except Exception as e:
+                for _, futures in pending.values():
+                    for future in futures:
+                        future.set_exception(e)
+                continue
+
+            with self._cache_lock:
+                self.batch_sizes[len(texts)] += 1
+                for key, vector in zip(pending, vectors):
+                    self._cache[key] = vector
+                    self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+            for (_, futures), vector in zip(pending.values(), vectors):
+                for future in futures:
+                    future.set_result(vector)
@@ -1,4 +1,8 @@
-﻿from flask import Flask, jsonify, request, Blueprint
+﻿import json
+import os
+import threading
+
+from flask import Flask, jsonify, request, Blueprint, Response, stream_with_context
 
 from app.handler.meeting import MeetingHandler
 from app.handler.section import SectionHandler
@@ -6,15 +10,16 @@ from app.handler.requisite import RequisiteHandler
 from app.handler.classes import ClassHandler
 from app.handler.rooms import RoomHandler
 from app.handler.stats import StatsHandler
+from app import bulk
 
 # Cross-Origin Resource Sharing
 from flask_cors import CORS, cross_origin
 
-# DB sync function
-from app.dao.classes import sync_all_sequences
-
 #Chatbot
-from app.llm.chatollama import ChatOllamaBot
+from app.llm import chatollama
+
+# Shared database connections
+from app.dao.pool import db_pool
 
 # Initialize Flask
 app = Flask(__name__)
@@ -22,11 +27,25 @@ CORS(app)
 
 api = Blueprint('api', __name__, url_prefix='/api')
 
-# Sync sequences at startup
-sync_all_sequences()
+# The chatbot is built on first use, so a worker can serve CRUD routes
+# without waiting on model loads.
+_chatbot = None
+_chatbot_lock = threading.Lock()
+
 
-#Chatbot call
-chatbot = ChatOllamaBot()
+def get_chatbot():
+    global _chatbot
+    if _chatbot is None:
+        with _chatbot_lock:
+            if _chatbot is None:
+                _chatbot = chatollama.ChatOllamaBot()
+    return _chatbot
+
+
+# gunicorn --preload with PRELOAD_MODELS=1 loads the embedder in the master
+# process; forked workers then share the weights copy-on-write.
+if os.environ.get("PRELOAD_MODELS") == "1":
+    chatollama.preload()
 
 @api.route('/')
 def greeting():
@@ -50,6 +69,10 @@ def getMeetingById(mid):
 def createMeeting():
     return MeetingHandler().createMeeting(request.json)
 
+@api.route('/meeting/bulk', methods=['POST'])
+def bulkCreateMeetings():
+    return bulk.handle(request, MeetingHandler().bulkCreateMeetings)
+
 
 # -------------------- SECTION --------------------
 @api.route('/section/<int:sid>', methods=['GET', 'PUT', 'DELETE'])
@@ -68,6 +91,10 @@ def getSectionById(sid):
 def createSection():
     return SectionHandler().createSection(request.json)
 
+@api.route('/section/bulk', methods=['POST'])
+def bulkCreateSections():
+    return bulk.handle(request, SectionHandler().bulkCreateSections)
+
 
 # -------------------- REQUISITE --------------------
 @api.route('/requisite/<int:classid>/<int:reqid>', methods=['GET', 'DELETE'])
@@ -102,6 +129,10 @@ def handleClassById(cid):
 def createClass():
     return ClassHandler().createClass(request.json)
 
+@api.route('/classes/bulk', methods=['POST'])
+def bulkCreateClasses():
+    return bulk.handle(request, ClassHandler().bulkCreateClasses)
+
 
 # -------------------- ROOMS --------------------
 @api.route('/room/<int:rid>', methods=['GET', 'PUT', 'DELETE'])
@@ -120,6 +151,10 @@ def handleRoomById(rid):
 def createRoom():
     return RoomHandler().createRoom(request.json)
 
+@api.route('/room/bulk', methods=['POST'])
+def bulkCreateRooms():
+    return bulk.handle(request, RoomHandler().bulkCreateRooms)
+
 
 # -------------------- STATS --------------------
 # Existing stats endpoint (sections by day)
@@ -236,16 +271,47 @@ def chat_endpoint():
     if not question:
         return jsonify(Error="Field 'question' is required"), 400
 
+    if data.get('stream'):
+        return Response(
+            stream_with_context(stream_chat_answer(question)),
+            mimetype='application/x-ndjson'
+        )
+
     try:
-        answer = chatbot.ask(question)
+        answer, chunk_ids = get_chatbot().ask_with_sources(question)
         return jsonify({
             "question": question,
-            "answer": answer
+            "answer": answer,
+            "chunk_ids": chunk_ids
         })
     except Exception as e:
         print(f"Chatbot error: {e}")
         return jsonify(Error="Internal chatbot error"), 500
 
+@api.route('/chat/stats', methods=['GET'])
+def chat_stats_endpoint():
+    disk_cache = chatollama.embedding_service.disk_cache
+    return jsonify({
+        "embedding": chatollama.embedding_service.stats(),
+        "embedding_disk_cache": disk_cache.stats() if disk_cache else None,
+        "answer_cache": chatollama.answer_cache.stats()
+    })
+
+@api.route('/db/stats', methods=['GET'])
+def db_stats_endpoint():
+    return jsonify(db_pool.stats())
+
+def stream_chat_answer(question):
+    """Chunked JSON lines: one {"token": ...} per LLM token, then {"done": true, "chunk_ids": [...]}."""
+    try:
+        chunk_ids = []
+        for token in get_chatbot().stream(question, sources=chunk_ids):
+            yield json.dumps({"token": token}) + "\n"
+        yield json.dumps({"done": True, "chunk_ids": chunk_ids}) + "\n"
+    except Exception as e:
+        print(f"Chatbot error: {e}")
+        yield json.dumps({"error": "Internal chatbot error"}) + "\n"
+
 app.register_blueprint(api)
 
 # -------------------- MAIN --------------------
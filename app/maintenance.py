@@ -0,0 +1,102 @@
+# maintenance.py
+#
+# One-off database maintenance tasks, run from the repository root:
+#   python -m app.maintenance vector-index create --method hnsw
+#   python -m app.maintenance vector-index info
+#   python -m app.maintenance text-index create
+#   python -m app.maintenance normalize-embeddings
+#   python -m app.maintenance sync-sequences
+
+import argparse
+import json
+
+from app.dao.classes import sync_all_sequences
+from app.dao.syllabus import SyllabusDAO, VECTOR_INDEX_METHODS
+
+
+def vector_index(args):
+    dao = SyllabusDAO()
+    try:
+        if args.action == "create":
+            dao.create_vector_index(
+                method=args.method, m=args.m, ef_construction=args.ef_construction, lists=args.lists
+            )
+        elif args.action == "rebuild":
+            dao.rebuild_vector_index()
+        elif args.action == "drop":
+            dao.drop_vector_index()
+        print(json.dumps(dao.vector_index_info(), indent=2))
+    finally:
+        dao.close()
+
+
+def text_index(args):
+    dao = SyllabusDAO()
+    try:
+        if args.action == "create":
+            dao.create_text_index()
+        else:
+            dao.drop_text_index()
+    finally:
+        dao.close()
+
+
+def normalize_embeddings(args):
+    """
+    Migrate rows stored before embeddings were normalized at ingestion, and
+    rebuild an existing index with the inner-product opclass retrieval uses.
+    """
+    dao = SyllabusDAO()
+    try:
+        updated = dao.normalize_stored_embeddings(batch_size=args.batch_size)
+        print(f"Normalized {updated} embeddings")
+
+        info = dao.vector_index_info()
+        if info is not None and "vector_ip_ops" not in info["definition"]:
+            method = "ivfflat" if "ivfflat" in info["definition"] else "hnsw"
+            dao.drop_vector_index()
+            dao.create_vector_index(method=method)
+            print(json.dumps(dao.vector_index_info(), indent=2))
+    finally:
+        dao.close()
+
+
+def sync_sequences(args):
+    print(json.dumps(sync_all_sequences(), indent=2))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Database maintenance tasks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    index_cmd = commands.add_parser("vector-index", help="Manage the pgvector index on syllabus")
+    index_cmd.add_argument("action", choices=["create", "rebuild", "drop", "info"])
+    index_cmd.add_argument("--method", choices=VECTOR_INDEX_METHODS, default="hnsw")
+    index_cmd.add_argument("--m", type=int, default=16, help="HNSW max connections per node")
+    index_cmd.add_argument("--ef-construction", type=int, default=64, help="HNSW build candidate list size")
+    index_cmd.add_argument("--lists", type=int, default=None, help="IVFFlat list count")
+    index_cmd.set_defaults(func=vector_index)
+
+    text_cmd = commands.add_parser(
+        "text-index", help="Manage the full-text (GIN) index used by hybrid retrieval"
+    )
+    text_cmd.add_argument("action", choices=["create", "drop"])
+    text_cmd.set_defaults(func=text_index)
+
+    normalize_cmd = commands.add_parser(
+        "normalize-embeddings", help="Rescale stored embeddings to unit length (one-off migration)"
+    )
+    normalize_cmd.add_argument("--batch-size", type=int, default=5000)
+    normalize_cmd.set_defaults(func=normalize_embeddings)
+
+    sequences_cmd = commands.add_parser(
+        "sync-sequences", help="Move serial sequences past MAX(id), after importing rows with explicit ids"
+    )
+    sequences_cmd.set_defaults(func=sync_sequences)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
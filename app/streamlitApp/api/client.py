@@ -1,3 +1,4 @@
+import json
 import streamlit as st
 import requests
 from api_config import API_BASE_URL
@@ -29,4 +30,26 @@ def send_chat_message(question):
         else:
             return {"error": f"Error {response.status_code}"}
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+def stream_chat_message(question):
+    """Send message to chatbot and yield answer tokens as they arrive"""
+    try:
+        with requests.post(
+            f"{API_LOCAL_BASE_URL}/chat",
+            json={"question": question, "stream": True},
+            stream=True
+        ) as response:
+            if response.status_code != 200:
+                yield f"Sorry, there was an error: Error {response.status_code}"
+                return
+            for line in response.iter_lines(decode_unicode=True):
+                if not line:
+                    continue
+                event = json.loads(line)
+                if "token" in event:
+                    yield event["token"]
+                elif "error" in event:
+                    yield f"Sorry, there was an error: {event['error']}"
+    except Exception as e:
+        yield f"Sorry, there was an error: {e}"
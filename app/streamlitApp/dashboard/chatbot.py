@@ -1,5 +1,5 @@
 import streamlit as st
-from api.client import send_chat_message
+from api.client import stream_chat_message
 
 def chatbot_page():
     st.subheader("💬 Course Chatbot")
@@ -24,18 +24,14 @@ def chatbot_page():
         
         # Get bot response
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                response = send_chat_message(question)
-                
-                if "error" in response:
-                    answer = f"Sorry, there was an error: {response['error']}"
-                else:
-                    answer = response.get("answer", "No response received")
-                
+            # Render tokens as the backend streams them
+            answer = st.write_stream(stream_chat_message(question))
+            if not answer:
+                answer = "No response received"
                 st.write(answer)
-                
-                # Add bot response to history
-                st.session_state.chat_history.append({"role": "assistant", "content": answer})
+            
+            # Add bot response to history
+            st.session_state.chat_history.append({"role": "assistant", "content": answer})
     
     # Clear chat button
     if st.button("Clear Chat History"):
@@ -0,0 +1,48 @@
+"""
+Per-request chatbot setup cost: rebuilding prompt + ChatOllama + chain for
+every question versus reusing the shared chain from get_chain().
+
+Run from the repository root:
+    python -m benchmarks.chain_setup [--iterations N] [--live]
+
+--live also sends a short question to the Ollama server with each variant,
+which shows the cost of opening a new connection per request.
+"""
+import argparse
+import time
+
+from langchain_ollama import ChatOllama
+from langchain_core.output_parsers import StrOutputParser
+
+from app.llm.chatollama import PROMPT, LLM_MODELS, DEFAULT_MODEL, get_chain
+
+
+def build_chain_per_request():
+    llm = ChatOllama(**LLM_MODELS[DEFAULT_MODEL])
+    return PROMPT | llm | StrOutputParser()
+
+
+def timed(label, make_chain, iterations, live):
+    inputs = {"documents": "Grading: exams 60%, projects 40%.", "question": "What is the grading?"}
+    start = time.perf_counter()
+    for _ in range(iterations):
+        chain = make_chain()
+        if live:
+            chain.invoke(inputs)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<20} {elapsed / iterations * 1000:9.3f} ms/request")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    get_chain()  # warm the shared chain so it is not counted
+    timed("rebuild per request", build_chain_per_request, args.iterations, args.live)
+    timed("shared chain", get_chain, args.iterations, args.live)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Relevance and latency of vector-only vs hybrid (vector + full-text, RRF)
+retrieval.
+
+Each question is asked for a sample of courses. A retrieved chunk counts as
+relevant when it contains one of the question's key terms, which is a rough
+but cheap stand-in for labelled data; precision@k is the share of relevant
+chunks in the top k.
+
+Run from the repository root against an ingested database:
+    python -m benchmarks.hybrid_retrieval [--courses N] [--k K] [--weights 1:1,1:0.5,1:2]
+"""
+import argparse
+import statistics
+import time
+
+from app.dao.syllabus import SyllabusDAO
+from app.llm.chatollama import EMBEDDING_MODEL
+
+# question -> key terms a relevant chunk should contain
+QUESTIONS = {
+    "What is the attendance policy?": ("attendance", "absence", "absences"),
+    "How is the final grade computed?": ("grade", "grading", "%"),
+    "When are the office hours?": ("office hours",),
+    "What textbook is required?": ("textbook", "text book", "edition"),
+    "What are the course prerequisites?": ("prerequisite", "pre-requisite", "prereq"),
+    "Is there a final exam?": ("final exam", "final examination"),
+    "What is the policy for students with disabilities?": ("disabilit", "accommodation"),
+    "What programming language is used?": ("python", "java", "c++", "language"),
+}
+
+
+def precision(rows, terms):
+    if not rows:
+        return 0.0
+    return sum(any(term in row[1].lower() for term in terms) for row in rows) / len(rows)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    rows = fn()
+    return rows, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--courses", type=int, default=10)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--weights", default="1:1,1:0.5,1:2", help="vector:text weight pairs")
+    args = parser.parse_args()
+
+    dao = SyllabusDAO()
+    with dao.conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT cid, cname, ccode FROM class
+            WHERE cid IN (SELECT courseid FROM syllabus)
+            ORDER BY random() LIMIT %s
+            """,
+            (args.courses,),
+        )
+        courses = cur.fetchall()
+    dao.conn.commit()
+    print(f"{len(courses)} courses x {len(QUESTIONS)} questions, top {args.k}\n")
+
+    # Asked the way users do, with the course code in the question
+    cases = [
+        (cid, f"{cname} {ccode} {question}", terms)
+        for cid, cname, ccode in courses
+        for question, terms in QUESTIONS.items()
+    ]
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(EMBEDDING_MODEL)
+    embeddings = model.encode([text for _, text, _ in cases], normalize_embeddings=True)
+
+    modes = {"vector": lambda q, emb, cid: dao.get_relevant_chunks(emb, courseid=cid, limit=args.k)}
+    for pair in args.weights.split(","):
+        vector_weight, text_weight = (float(w) for w in pair.split(":"))
+        modes[f"hybrid {pair}"] = (
+            lambda q, emb, cid, vw=vector_weight, tw=text_weight:
+            dao.get_hybrid_chunks(emb, q, courseid=cid, limit=args.k, vector_weight=vw, text_weight=tw)
+        )
+
+    for name, search in modes.items():
+        scores, latencies = [], []
+        for (cid, text, terms), emb in zip(cases, embeddings):
+            rows, elapsed = timed(lambda: search(text, emb, cid))
+            scores.append(precision(rows, terms))
+            latencies.append(elapsed)
+        if not latencies:
+            break
+        latencies.sort()
+        print(f"{name:<16} precision@{args.k} {statistics.mean(scores):.3f}   "
+              f"mean {statistics.mean(latencies) * 1000:7.2f} ms   "
+              f"p95 {latencies[max(int(len(latencies) * 0.95) - 1, 0)] * 1000:7.2f} ms")
+
+    dao.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Worker startup time: how long `import app.main` takes and how long the
+first CRUD-only request waits, with and without PRELOAD_MODELS.
+
+Run from the repository root:
+    python -m benchmarks.startup [--runs N]
+
+Each measurement runs in a fresh interpreter, like a new gunicorn worker.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROBE = """
+import json, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+app.main.app.test_client().get('/api/')
+first_request = time.perf_counter()
+print(json.dumps({"import": imported - start, "first_request": first_request - imported}))
+"""
+
+
+def measure(preload, runs):
+    env = dict(os.environ, PRELOAD_MODELS="1" if preload else "0")
+    results = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", PROBE], env=env, check=True,
+                             capture_output=True, text=True).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+    return {key: min(r[key] for r in results) for key in results[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    for preload in (False, True):
+        timings = measure(preload, args.runs)
+        label = "preload" if preload else "lazy"
+        print(f"{label:<8} import {timings['import']:7.3f} s   "
+              f"first request {timings['first_request']:7.3f} s")
+
+
+if __name__ == "__main__":
+    main()
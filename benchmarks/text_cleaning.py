@@ -0,0 +1,98 @@
+"""
+Checks that app.textclean produces exactly the output of the original
+five-pass clean_syllabus_text, and compares their speed.
+
+The corpus is the edge cases below plus, when pypdf is installed, the
+pages of every PDF in app/SyllabusFolder. Both the whole-document
+cleaner and the page-wise clean_pages() are compared against the
+original function applied to "\\n".join(pages).
+
+Run from the repository root:
+    python -m benchmarks.text_cleaning [--repeat N] [--no-pdfs]
+"""
+import argparse
+import os
+import re
+import time
+
+from app.textclean import clean_pages, clean_syllabus_text
+
+SYLLABUS_FOLDER = os.path.join(os.path.dirname(__file__), "..", "app", "SyllabusFolder")
+
+# Small documents that exercise each rule and the places they interact
+EDGE_CASES = [
+    [""],
+    ["   \n\n  "],
+    ["CourseDescription: DataStructures"],
+    ["Exams 130% Projects 12% Quizzes 1234% 99%"],
+    ["a  b   c    d", "e\t\tf"],
+    ["line one \n line two  \n\n\n\n line three"],
+    ["para\n \n \n \nafter spaced blank lines"],
+    ["end of page  ", "  start of next"],
+    ["trailing newlines\n\n", "\n\nleading newlines"],
+    ["", "", "only middle page", ""],
+    ["tab at end\t", "\tand start"],
+    ["GradingPolicy\n\n\n\nAttendanceIs required 100%", "ADA\n\n", "  "],
+    ["mixed \n\n \n\n\n \nruns", "x\r\ny"],
+]
+
+
+def legacy_clean_syllabus_text(text: str) -> str:
+    """The cleaner as it was in filehandler.py before app.textclean."""
+    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
+    text = re.sub(r'(\d)(\d{2,})%', r'\2%', text)
+    text = re.sub(r' +', ' ', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = re.sub(r' *\n *', '\n', text)
+    return text.strip()
+
+
+def load_pdf_corpus():
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        print("pypdf not installed; using the edge cases only")
+        return []
+    corpus = []
+    for filename in sorted(os.listdir(SYLLABUS_FOLDER)):
+        if filename.lower().endswith(".pdf"):
+            reader = PdfReader(os.path.join(SYLLABUS_FOLDER, filename))
+            corpus.append([page.extract_text() or "" for page in reader.pages])
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--no-pdfs", action="store_true")
+    args = parser.parse_args()
+
+    corpus = EDGE_CASES + ([] if args.no_pdfs else load_pdf_corpus())
+    documents = ["\n".join(pages) for pages in corpus]
+
+    mismatches = 0
+    for pages, document in zip(corpus, documents):
+        expected = legacy_clean_syllabus_text(document)
+        if clean_syllabus_text(document) != expected:
+            mismatches += 1
+            print(f"clean_syllabus_text differs on {document[:60]!r}")
+        if "".join(clean_pages(pages)) != expected:
+            mismatches += 1
+            print(f"clean_pages differs on {document[:60]!r}")
+    print(f"{len(corpus)} documents, {sum(map(len, documents)):,} chars, {mismatches} mismatches")
+
+    for label, run in (
+        ("original (5 passes)", lambda: [legacy_clean_syllabus_text(d) for d in documents]),
+        ("clean_syllabus_text", lambda: [clean_syllabus_text(d) for d in documents]),
+        ("clean_pages", lambda: ["".join(clean_pages(p)) for p in corpus]),
+    ):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            run()
+        print(f"{label:<22} {(time.perf_counter() - start) / args.repeat * 1000:8.2f} ms per corpus pass")
+
+    raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Recall vs latency of the pgvector index against exact search.
+
+Stored chunk embeddings are used as queries. Exact top-k is computed with
+index scans disabled, then each ef_search (HNSW) or probes (IVFFlat)
+value is timed and scored by recall@k.
+
+The chatbot nearly always searches within one course, and pgvector filters
+after the index scan, so the same values are also measured with each query
+restricted to its chunk's course (recall and rows returned), next to the
+exact per-course search SyllabusDAO.get_relevant_chunks uses.
+
+Run from the repository root after creating the index:
+    python -m app.maintenance vector-index create --method hnsw
+    python -m benchmarks.vector_index [--queries N] [--k K] [--values 10,40,100]
+"""
+import argparse
+import json
+import statistics
+import time
+
+from app.dao.syllabus import SyllabusDAO
+
+SEARCH = """
+    SELECT chunkid FROM syllabus
+    WHERE %(courseid)s::int IS NULL OR courseid = %(courseid)s
+    ORDER BY embedding_text <#> %(embedding)s::vector
+    LIMIT %(k)s
+"""
+
+
+def search(dao, embedding, k, setting=None, value=None, exact=False, courseid=None):
+    with dao.conn.cursor() as cur:
+        if exact:
+            cur.execute("SET LOCAL enable_indexscan = off;")
+        elif setting:
+            cur.execute("SELECT set_config(%s, %s, true)", (setting, str(value)))
+        start = time.perf_counter()
+        cur.execute(SEARCH, {"embedding": embedding, "k": k, "courseid": courseid})
+        ids = {row[0] for row in cur.fetchall()}
+        elapsed = time.perf_counter() - start
+    dao.conn.commit()
+    return ids, elapsed
+
+
+def report(label, results, exact):
+    """Print recall@k against exact search, rows returned and latency."""
+    recall = statistics.mean(
+        len(ids & truth) / len(truth) for (ids, _), (truth, _) in zip(results, exact) if truth
+    )
+    rows = statistics.mean(len(ids) for ids, _ in results)
+    latency = statistics.mean(t for _, t in results) * 1000
+    print(f"{label:<22} recall {recall:.3f}   rows {rows:5.1f}   {latency:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--values", default="10,20,40,80,160")
+    args = parser.parse_args()
+
+    dao = SyllabusDAO()
+    info = dao.vector_index_info()
+    if info is None:
+        print("No vector index; only exact search will be measured.")
+        setting = None
+    else:
+        print(info["definition"])
+        setting = "hnsw.ef_search" if "hnsw" in info["definition"] else "ivfflat.probes"
+
+    with dao.conn.cursor() as cur:
+        cur.execute(
+            "SELECT embedding_text::text, courseid FROM syllabus WHERE courseid IS NOT NULL "
+            "ORDER BY random() LIMIT %s",
+            (args.queries,),
+        )
+        queries = cur.fetchall()
+    dao.conn.commit()
+
+    for label, filtered in (("all courses", False), ("one course", True)):
+        print(f"\n{label}")
+        cases = [(q, courseid if filtered else None) for q, courseid in queries]
+        exact = [search(dao, q, args.k, exact=True, courseid=c) for q, c in cases]
+        report("exact", exact, exact)
+
+        if filtered:
+            # Also returns shared rows the course links to, which SEARCH does not
+            results = []
+            for q, c in cases:
+                start = time.perf_counter()
+                rows = dao.get_relevant_chunks(json.loads(q), courseid=c, limit=args.k)
+                results.append(({row[0] for row in rows}, time.perf_counter() - start))
+            report("get_relevant_chunks", results, exact)
+
+        if setting:
+            for value in (int(v) for v in args.values.split(",")):
+                results = [search(dao, q, args.k, setting, value, courseid=c) for q, c in cases]
+                report(f"{setting}={value}", results, exact)
+
+    dao.close()
+
+
+if __name__ == "__main__":
+    main()
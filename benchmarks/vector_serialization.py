@@ -0,0 +1,57 @@
+"""
+Per-query cost of sending a 768-d embedding to Postgres: the old
+",".join(map(str, emb.tolist())) string versus the Vector adapter.
+
+Run from the repository root:
+    python -m benchmarks.vector_serialization [--iterations N] [--db]
+
+--db also times a round-trip of `SELECT %s::vector` / `SELECT %s` so the
+server-side parse of the shorter literal is included.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.dao.vector import Vector
+
+
+def legacy_param(embedding):
+    return "[" + ",".join(map(str, embedding.tolist())) + "]"
+
+
+def timed(label, fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed / iterations * 1e6:9.1f} us/query")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--db", action="store_true")
+    args = parser.parse_args()
+
+    embedding = np.random.default_rng(0).standard_normal(768).astype(np.float32)
+    embedding /= np.linalg.norm(embedding)
+
+    print(f"literal size: legacy {len(legacy_param(embedding))} chars, "
+          f"Vector {len(Vector(embedding).to_text())} chars")
+    timed("legacy string", lambda: legacy_param(embedding), args.iterations)
+    timed("Vector adapter", lambda: Vector(embedding).getquoted(), args.iterations)
+
+    if args.db:
+        from app.dao.syllabus import SyllabusDAO
+        dao = SyllabusDAO()
+        with dao.conn.cursor() as cur:
+            timed("legacy string + round-trip",
+                  lambda: cur.execute("SELECT %s::vector", (legacy_param(embedding),)), args.iterations // 10)
+            timed("Vector adapter + round-trip",
+                  lambda: cur.execute("SELECT %s", (Vector(embedding),)), args.iterations // 10)
+        dao.close()
+
+
+if __name__ == "__main__":
+    main()